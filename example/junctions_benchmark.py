@@ -0,0 +1,62 @@
+import numpy as np
+import timeit
+
+from copy import copy
+from nn_simulator.logger import logger
+from nn_simulator.model.device.datasheet.factory import from_density
+from nn_simulator.model.device.wires import detect_junctions
+from nn_simulator.model.device.wires import detect_junctions_pairwise
+from nn_simulator.model.device.wires import generate_wires_distribution
+
+
+################################################################################
+# BENCHMARK SETUP
+
+density = 8.0           # density of the generated devices
+wires_length = 40.0     # average length of the wires
+sizes = [100, 200, 400, 800, 1600]    # package sizes to benchmark
+pairwise_limit = 3000   # maximum number of wires tested pairwise
+repetitions = 3         # number of runs of each detection
+
+
+def distribution(size: int):
+    datasheet = from_density(density, size, wires_length)
+    return generate_wires_distribution(
+        number_of_wires=datasheet.wires_count,
+        wire_av_length=datasheet.mean_length,
+        wire_dispersion=datasheet.std_length,
+        general_normal_shape=10,
+        centroid_dispersion=datasheet.centroid_dispersion,
+        seed=datasheet.seed,
+        Lx=datasheet.Lx,
+        Ly=datasheet.Ly
+    )
+
+
+def measure(detection, wires_dict) -> float:
+    return min(timeit.repeat(
+        lambda: detection(copy(wires_dict)), number=1, repeat=repetitions
+    ))
+
+
+################################################################################
+# BENCHMARK
+
+logger.info('wires\tjunctions\tgrid (s)\tpairwise (s)')
+
+for size in sizes:
+    wires_dict = distribution(size)
+    grid, pairwise = copy(wires_dict), copy(wires_dict)
+    detect_junctions(grid)
+
+    # the pairwise detection is quadratic: skip it on the biggest devices
+    elapsed = float('nan')
+    if grid['number_of_wires'] <= pairwise_limit:
+        detect_junctions_pairwise(pairwise)
+        assert np.array_equal(grid['edge_list'], pairwise['edge_list'])
+        elapsed = measure(detect_junctions_pairwise, wires_dict)
+
+    logger.info('%d\t%d\t%.4f\t%.4f' % (
+        grid['number_of_wires'], grid['number_of_junctions'],
+        measure(detect_junctions, wires_dict), elapsed
+    ))
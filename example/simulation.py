@@ -20,9 +20,9 @@ if all(backup.exist()):
 
 # if the backup-files does not exists, create the network and save it
 else:
-    # create a device that is represented by the given datasheet
-    wires_dict = generate_network_data(default)
-    graph = nanowire_network(wires_dict, default.Y_min)
+    # create a device that is represented by the given datasheet, reusing the
+    # one in the cache if it has already been generated
+    graph, wires_dict = cache.generate(default, default.Y_min)
 
     # save a copy of the created graphs
     backup.save(default, graph, wires_dict, dict())
@@ -62,11 +62,16 @@ logger.debug('Growth of the conductive path')
 # creation of an analysis utility and save of initial state
 evolution = Evolution(default, wires_dict, delta_t, loads)
 
-# growth over time
-for i in range(steps):
-    stimulate(graph, default, delta_t, dict(stimulation[i]))
-    evolution.append(graph, dict(stimulation[i]))
-    progressbar.update(i+1)
+# growth over time, recording each step
+schedule = [dict(_) for _ in stimulation]
+
+
+def record(step, network):
+    evolution.append(network, schedule[step])
+    progressbar.update(step + 1)
+
+
+stimulate_sequence(graph, default, delta_t, schedule, callback=record)
 progressbar.finish()
 
 ###############################################################################
@@ -1,35 +1,47 @@
 # -*- coding: utf-8 -*-
-from nn_simulator.controller import backup
-from nn_simulator.model.analysis.evolution import Evolution
+from nn_simulator import backend
+from nn_simulator.controller import backup, cache
+from nn_simulator.model.analysis.evolution import Evolution, Recording
 from nn_simulator.model.analysis.measures import print_info, inspect
 from nn_simulator.model.device.datasheet.Datasheet import default
 from nn_simulator.model.device.factory import nanowire_network
 from nn_simulator.model.device.networks import generate_network_data
 from nn_simulator.model.device.networks import nn2nx, nx2nn
+from nn_simulator.model.device.wires import NoJunctionsError
 from nn_simulator.model.interface.factory import random_nodes, random_loads
-from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.interface.connector import attach, connect, detach
+from nn_simulator.model.interface.connector import reserve
 from nn_simulator.model.interface.evolutor import mutate, non_ground_selection
 from nn_simulator.model.interface.evolutor import minimum_distance_selection
-from nn_simulator.model.stimulator import stimulate
+from nn_simulator.model.batch import replicate, stimulate_batch
+from nn_simulator.model.packing import pack, stimulate_pack, unpack
+from nn_simulator.model.stimulator import stimulate, stimulate_adaptive
+from nn_simulator.model.stimulator import stimulate_sequence
 from nn_simulator.view import plot
 
 LOGGER_NAME = 'nanowire-network-simulator-lib'
 
 __all__ = [
+    # array backend selection (cupy or numpy)
+    "backend",
     # file system interactions
-    "backup",
+    "backup", "cache",
     # statistical analysis
     "Evolution",                # network-state collectors for analysis
+    "Recording",                # recording policy of the collectors
     "print_info", "inspect",    # supervision utils
     # device utilities & configurations
     "default",
     # nanowire networks operation/utils
-    "connect", "nanowire_network", "generate_network_data", "nn2nx", "nx2nn",
+    "connect", "attach", "detach", "reserve", "nanowire_network",
+    "generate_network_data", "nn2nx", "nx2nn",
+    "NoJunctionsError",         # device without intersecting wires
     # interface / connection definition
     "random_nodes", "random_loads", "mutate", "non_ground_selection",
     "minimum_distance_selection",
     # stimulation utilities for the network
-    "stimulate",
+    "stimulate", "stimulate_adaptive", "stimulate_sequence", "replicate",
+    "stimulate_batch", "pack", "stimulate_pack", "unpack",
     # logging utilities & setups
     "LOGGER_NAME",
     # plotting utils
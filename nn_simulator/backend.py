@@ -0,0 +1,110 @@
+"""
+Array backend of the library. The module forwards the arrays creation and
+manipulation, and the dense linear algebra, to the selected array module:
+either CuPy, that runs on the GPU, or NumPy, that runs on the CPU. Sparse
+networks always use SciPy.
+The backend is selected with `use` or, before its first use, with the
+NN_SIMULATOR_BACKEND environment variable. By default, CuPy is used if it is
+installed, NumPy otherwise.
+The backend is resolved on each access, not when the library is imported:
+the modules of the library only refer to it in (postponed) annotations and in
+function bodies. Arrays created before a change of backend stay in their
+memory, and operations mixing them with new ones fail.
+"""
+import importlib
+import numpy as np
+import os
+import sys
+
+from types import ModuleType
+from typing import Any
+
+VARIABLE = 'NN_SIMULATOR_BACKEND'
+BACKENDS = ('cupy', 'numpy')
+
+__module: ModuleType | None = None
+
+
+def use(name: str) -> ModuleType:
+    """
+    Select the array module used by the library, for the following
+    operations. Arrays created with the previous backend are not moved.
+
+    Parameters
+    ----------
+    name: str
+        The name of the backend, either 'cupy' or 'numpy'
+    Returns
+    -------
+    The selected array module.
+    """
+
+    global __module
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown array backend: {name}')
+    __module = importlib.import_module(name)
+    return __module
+
+
+def current() -> ModuleType:
+    """
+    Returns the array module used by the library, selecting the default one
+    on the first call.
+
+    Returns
+    -------
+    The array module of the backend.
+    """
+
+    if __module is None:
+        name = os.environ.get(VARIABLE)
+        if name:
+            return use(name)
+        try:
+            return use('cupy')
+        except ImportError:
+            return use('numpy')
+    return __module
+
+
+def get_array_module(*arrays: Any) -> ModuleType:
+    """
+    Returns the array module of the given arrays, independently of the
+    selected backend.
+
+    Parameters
+    ----------
+    arrays: Any
+        The arrays of which get the module
+    Returns
+    -------
+    CuPy if any of the arrays is a CuPy one, NumPy otherwise.
+    """
+
+    # no cupy array exists if cupy has never been imported
+    cupy = sys.modules.get('cupy')
+    return cupy.get_array_module(*arrays) if cupy else np
+
+
+def asnumpy(array: Any) -> np.ndarray:
+    """
+    Returns a copy of the array in the host memory, if it is not there.
+
+    Parameters
+    ----------
+    array: Any
+        The array to move to the host memory
+    Returns
+    -------
+    The array as a numpy one.
+    """
+
+    cupy = sys.modules.get('cupy')
+    return cupy.asnumpy(array) if cupy else np.asarray(array)
+
+
+def __getattr__(name: str) -> Any:
+    # module attributes (e.g., __path__) must not be taken from the backend
+    if name.startswith('__'):
+        raise AttributeError(name)
+    return getattr(current(), name)
@@ -2,6 +2,7 @@ import dataclasses
 import json
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 
 from nn_simulator.logger import logger
 from nn_simulator.model.device import Datasheet
@@ -15,6 +16,7 @@ __DATASHEET_FILE = "datasheet.dat"
 __GRAPH_FILE = "graph.dat"
 __WIRES_FILE = "wires.dat"
 __CONNECTIONS_FILE = "connections.dat"
+__SPARSE_KEYS = {'shape', 'row', 'col', 'data'}
 
 
 def save(
@@ -57,11 +59,7 @@ def save(
         del wires['G']
 
     # convert wires dict to correct format
-    wires = dict([
-        (key, value) if not isinstance(value, np.ndarray)
-        else (key, value.tolist())
-        for key, value in wires.items()
-    ])
+    wires = dict([(key, encode(value)) for key, value in wires.items()])
 
     pairs = [
         (datasheet_file, dataclasses.asdict(datasheet)),
@@ -108,7 +106,8 @@ def read(
         datasheet_file: str = __DATASHEET_FILE,
         graph_file: str = __GRAPH_FILE,
         wires_file: str = __WIRES_FILE,
-        connections_file: str = __CONNECTIONS_FILE
+        connections_file: str = __CONNECTIONS_FILE,
+        sparse: bool = False
 ) -> Tuple[Network, Datasheet, Dict[str, Any], Dict[str, int]]:
     """
     Read graph, datasheet and wires from the files and import them.
@@ -123,6 +122,8 @@ def read(
         Name of the wires file
     connections_file: str
         Name of the connections file
+    sparse: bool
+        If True, the imported network is a sparse one
 
     Returns
     -------
@@ -140,16 +141,12 @@ def read(
     with open(graph_file, 'r') as file:
         text = json.load(file)
         graph = nx.node_link_graph(text)
-        network = nx2nn(graph)
+        network = nx2nn(graph, sparse)
 
     # load and convert the json to a wires dict
     with open(wires_file, 'r') as file:
         wires = json.load(file)
-        wires = dict([
-            (key, value) if not isinstance(value, list)
-            else (key, np.asarray(value, dtype=np.float32))
-            for key, value in wires.items()
-        ])
+        wires = dict([(key, decode(value)) for key, value in wires.items()])
 
     # load and convert the json to a wires dict
     with open(connections_file, 'r') as file:
@@ -157,3 +154,56 @@ def read(
 
     # build the graph and return it
     return network, datasheet, wires, connections
+
+
+def encode(value: Any) -> Any:
+    """
+    Convert a value of the wires dictionary to a json serializable format.
+    Sparse matrices are saved as the coordinates of their non-zero entries.
+
+    Parameters
+    ----------
+    value: Any
+        The value to convert
+
+    Returns
+    -------
+    A json serializable representation of the value.
+    """
+
+    if sp.issparse(value):
+        value = value.tocoo()
+        return dict(
+            shape=value.shape,
+            row=value.row.tolist(), col=value.col.tolist(),
+            data=value.data.tolist()
+        )
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def decode(value: Any) -> Any:
+    """
+    Convert a value of the wires dictionary from its json format.
+
+    Parameters
+    ----------
+    value: Any
+        The value to convert
+
+    Returns
+    -------
+    The value of the wires dictionary: an array for lists and a CSR sparse
+    matrix for encoded sparse matrices.
+    """
+
+    if isinstance(value, dict) and value.keys() == __SPARSE_KEYS:
+        return sp.csr_matrix(
+            (np.asarray(value['data'], dtype=np.float32),
+             (value['row'], value['col'])),
+            shape=value['shape']
+        )
+    if isinstance(value, list):
+        return np.asarray(value, dtype=np.float32)
+    return value
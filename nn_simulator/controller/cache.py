@@ -0,0 +1,269 @@
+import dataclasses
+import hashlib
+import json
+import numpy as np
+import os
+import scipy.sparse as sp
+import tempfile
+
+from nn_simulator import backend as cp
+from nn_simulator.logger import logger
+from nn_simulator.model.device import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.network import Network
+from nn_simulator.model.device.networks import generate_network_data
+from typing import Any, Dict, Tuple
+
+__CACHE_DIRECTORY = os.path.join(
+    os.path.expanduser('~'), '.cache', 'nn_simulator'
+)
+__CACHE_SIZE = 2 ** 30
+__CACHE_VERSION = 2
+__EXTENSION = '.npz'
+__SEPARATOR = '/'
+
+
+def generate(
+        datasheet: Datasheet,
+        initial_conductance: float,
+        grounds: int = 0,
+        sparse: bool = False,
+        directory: str = __CACHE_DIRECTORY,
+        max_size: int = __CACHE_SIZE
+) -> Tuple[Network, Dict]:
+    """
+    Generate the network data and the nanowire network of a datasheet, reading
+    them from the cache if they have already been generated. A generated
+    network is saved in the cache, removing the least recently used ones if the
+    cache exceeds its maximum size.
+
+    Parameters
+    ----------
+    datasheet: Datasheet
+        The technical representation of the network
+    initial_conductance: float
+        The float value to set as conductance
+    grounds: int
+        Number of network nodes to be considered grounds
+    sparse: bool
+        If True, the adjacency matrix of the network data and the network are
+        sparse
+    directory: str
+        The directory of the cache
+    max_size: int
+        Maximum size of the cache in bytes
+
+    Returns
+    -------
+    A tuple containing the network and the wires dictionary.
+    """
+
+    path = os.path.join(directory, key(
+        datasheet,
+        initial_conductance=initial_conductance, grounds=grounds, sparse=sparse
+    ) + __EXTENSION)
+
+    # read the network from the cache and mark it as recently used
+    if os.path.exists(path):
+        logger.info('Reading network from cache')
+        network, wires = load(path)
+        os.utime(path)
+        return network, wires
+
+    wires = generate_network_data(datasheet, sparse)
+    network = nanowire_network(wires, initial_conductance, grounds, sparse)
+
+    store(path, network, wires)
+    evict(directory, max_size)
+
+    return network, wires
+
+
+def key(datasheet: Datasheet, **others: Any) -> str:
+    """
+    Calculate a stable identifier of a network generation.
+
+    Parameters
+    ----------
+    datasheet: Datasheet
+        The technical representation of the network
+    others: Any
+        Other json serializable parameters of the generation
+
+    Returns
+    -------
+    The hexadecimal sha256 digest of the datasheet fields and parameters.
+    """
+
+    description = json.dumps(dict(
+        version=__CACHE_VERSION,
+        datasheet=dataclasses.asdict(datasheet),
+        **others
+    ), sort_keys=True)
+
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def store(path: str, network: Network, wires: Dict):
+    """
+    Save the network and the wires dictionary in a numpy binary file.
+
+    Parameters
+    ----------
+    path: str
+        The file where to save the network
+    network: Network
+        The network to save
+    wires: Dict
+        The wires dictionary of the network
+    """
+
+    logger.info('Saving network to cache')
+
+    arrays = dict()
+    for name, value in wires.items():
+        flatten(arrays, ('wires', name), value)
+    for field in filter(lambda _: _.init, dataclasses.fields(network)):
+        flatten(arrays, ('network', field.name), getattr(network, field.name))
+
+    # write to a temporary file to not leave partial entries, with a unique
+    # name so that concurrent writers of the same entry do not collide
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+            dir=directory, suffix='.tmp', delete=False
+    ) as file:
+        try:
+            np.savez(file, **arrays)
+        except BaseException:
+            os.remove(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def load(path: str) -> Tuple[Network, Dict]:
+    """
+    Read the network and the wires dictionary from a numpy binary file.
+
+    Parameters
+    ----------
+    path: str
+        The file from which read the network
+
+    Returns
+    -------
+    A tuple containing the network and the wires dictionary.
+    """
+
+    with np.load(path) as file:
+        arrays = dict(file)
+
+    wires, network = unflatten(arrays, 'wires'), unflatten(arrays, 'network')
+
+    # move the network arrays to the device memory, if it is not sparse
+    def device(value: Any) -> Any:
+        if isinstance(value, tuple):
+            return tuple(map(device, value))
+        if isinstance(value, np.ndarray):
+            return cp.asarray(np.ascontiguousarray(value))
+        return value
+
+    if not sp.issparse(network['adjacency']):
+        network = {k: device(v) for k, v in network.items()}
+    network = Network(**network)
+    return network, wires
+
+
+def evict(directory: str, max_size: int):
+    """
+    Remove the least recently used entries of the cache until its size is
+    below the maximum one. The most recent entry is always kept.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the cache
+    max_size: int
+        Maximum size of the cache in bytes
+    """
+
+    entries = [
+        os.path.join(directory, _) for _ in os.listdir(directory)
+        if _.endswith(__EXTENSION)
+    ]
+    entries = sorted(entries, key=os.path.getmtime, reverse=True)
+
+    size = sum(map(os.path.getsize, entries))
+    for path in entries[1:][::-1]:
+        if size <= max_size:
+            break
+        size -= os.path.getsize(path)
+        os.remove(path)
+
+
+def flatten(arrays: Dict[str, np.ndarray], name: Tuple[str, ...], value: Any):
+    """
+    Add a value to a dictionary of numpy arrays, splitting the tuples and the
+    sparse matrices in their components.
+
+    Parameters
+    ----------
+    arrays: Dict[str, np.ndarray]
+        The dictionary where to add the value
+    name: Tuple[str, ...]
+        The path of the value
+    value: Any
+        The value to add
+    """
+
+    if sp.issparse(value):
+        value = value.tocsr()
+        for component in ('data', 'indices', 'indptr', 'shape'):
+            arrays[__SEPARATOR.join(name + ('csr', component))] = np.asarray(
+                getattr(value, component)
+            )
+    elif isinstance(value, tuple):
+        arrays[__SEPARATOR.join(name + ('tuple',))] = np.asarray(len(value))
+        for index, item in enumerate(value):
+            flatten(arrays, name + (str(index),), item)
+    elif isinstance(value, cp.ndarray):
+        arrays[__SEPARATOR.join(name)] = cp.asnumpy(value)
+    else:
+        arrays[__SEPARATOR.join(name)] = np.asarray(value)
+
+
+def unflatten(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, Any]:
+    """
+    Rebuild the values saved with `flatten` under a given prefix.
+
+    Parameters
+    ----------
+    arrays: Dict[str, np.ndarray]
+        The dictionary of flattened values
+    prefix: str
+        The common path of the values to rebuild
+
+    Returns
+    -------
+    A dictionary of the values under the prefix.
+    """
+
+    def value(*name: str) -> Any:
+        def path(*others: str) -> str: return __SEPARATOR.join(name + others)
+
+        if path('tuple') in arrays:
+            length = arrays[path('tuple')].item()
+            return tuple(value(*name, str(_)) for _ in range(length))
+        if path('csr', 'data') in arrays:
+            components = ('data', 'indices', 'indptr')
+            return sp.csr_matrix(
+                tuple(arrays[path('csr', _)] for _ in components),
+                shape=tuple(arrays[path('csr', 'shape')])
+            )
+        return arrays[path()] if arrays[path()].ndim else arrays[path()].item()
+
+    names = {
+        _.split(__SEPARATOR)[1] for _ in arrays
+        if _.split(__SEPARATOR)[0] == prefix
+    }
+    return {_: value(prefix, _) for _ in names}
@@ -1,20 +1,65 @@
-import cupy as cp
+from __future__ import annotations
+
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 
-from collections.abc import Iterable, Generator
+from collections.abc import Iterable, Generator, Sequence
 from dataclasses import dataclass, field
-from functools import cached_property
+from nn_simulator import backend as cp
 from nn_simulator.model.analysis.utils import calculate_currents
 from nn_simulator.model.device import Datasheet
 from nn_simulator.model.device.network import Network as Nw, copy
 from nn_simulator.model.device.networks import nn2nx
+from nn_simulator.model.utils import sparse_rows
 from typing import Set, Tuple, List, Dict
 
 
+@dataclass(frozen=True)
+class Recording:
+    """
+    Policy of the states recorded by an evolution. The default one records
+    every field of every step.
+
+    Fields
+    ------
+    every: int
+        a step out of `every` appended ones is recorded, starting from the
+        first one
+    last: int | None
+        number of recorded steps kept, dropping the oldest ones as in a ring
+        buffer; if None, all the recorded steps are kept
+    admittance: bool
+        True if the admittance of the junctions is recorded; otherwise, the
+        admittance and the conductance of the junctions are NaN
+    nodes: Tuple[int, ...] | None
+        nodes whose voltage is recorded, while the others are NaN; if None,
+        all the device nodes
+    half: bool
+        True if the admittance is stored in half precision (i.e., float16)
+    """
+
+    every: int = 1
+    last: int | None = None
+    admittance: bool = True
+    nodes: Tuple[int, ...] | None = None
+    half: bool = False
+
+
 @dataclass
 class Evolution:
     """
     Contains the evolution/history of the network.
+    The structure of the device is stored once, at the first append, while
+    each step only records the admittance of the junctions and the voltages
+    of the nodes, in arrays that grow geometrically. The networks of the
+    steps are rebuilt on access, with the conductance of the junctions
+    derived from their admittance as in the conductance update. The states
+    whose conductance is not derived from the admittance (e.g., the initial
+    one, or an imported network) also record the conductance.
+    The recording policy selects the recorded steps and fields: the fields
+    that are not recorded are NaN in the rebuilt networks, and so are the
+    quantities derived from them (e.g., the currents).
 
     Parameters
     ----------
@@ -27,20 +72,43 @@ class Evolution:
     loads: Dict[int, float]
         Node connection index (int) and resistance (float) of external loads.
         May be empty if the simulation does not include loads
-    network_instances: List[Tuple[NN, List[Tuple[int, float]]]]
-        Contains the sequence of networks representing the evolution in time
+    recording: Recording
+        Policy of the recorded steps and fields
     """
 
     datasheet: Datasheet
     wires_dict: Dict
     delta_time: float
     loads: Dict[int, float] = field(default_factory=dict)
-    instances: List[Tuple[Nw, Dict[int, float]]] = field(default_factory=list)
+    recording: Recording = field(default_factory=Recording)
+
+    # device structure, in the host memory, and its junctions entries: their
+    # rows and columns or, if sparse, the data position of each entry and of
+    # its symmetric one
+    structure: Nw | None = field(default=None, init=False, repr=False)
+    rows: np.ndarray = field(default=None, init=False, repr=False)
+    columns: np.ndarray = field(default=None, init=False, repr=False)
+    nodes: np.ndarray = field(default=None, init=False, repr=False)
+
+    # state of the recorded steps, in slots that are reused by the ring buffer
+    appended: int = field(default=0, init=False, repr=False)
+    recorded: int = field(default=0, init=False, repr=False)
+    size: int = field(default=0, init=False, repr=False)
+    admittances: np.ndarray = field(default=None, init=False, repr=False)
+    voltages: np.ndarray = field(default=None, init=False, repr=False)
+    stimuli: List[Dict[int, float]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    circuits: Dict[int, np.ndarray] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    steps: List[int] = field(default_factory=list, init=False, repr=False)
 
     def append(self, graph: Nw, stimulus: Dict[int, float]):
         """
-        Add a network (i.e., network state) to the history. The instance is
-        copied before being add.
+        Add a network (i.e., network state) to the history. Only the state of
+        the device junctions and nodes is recorded, according to the recording
+        policy, while its structure must not change between the appends.
 
         Parameters
         ----------
@@ -51,7 +119,202 @@ class Evolution:
             instant
         """
 
-        self.instances.append((copy(graph.device), stimulus))
+        step, self.appended = self.appended, self.appended + 1
+        if step % self.recording.every:
+            return
+
+        device = graph.device
+        if self.structure is None:
+            self.record(device)
+        if device.adjacency.shape != self.structure.adjacency.shape:
+            raise ValueError('The structure of the device has changed')
+
+        # the ring buffer overwrites the oldest slot, once full
+        if (last := self.recording.last) is None:
+            slot = self.size
+            self.admittances = grown(self.admittances, slot + 1)
+            self.voltages = grown(self.voltages, slot + 1)
+        else:
+            slot = self.recorded % last
+
+        # gather the state of the junctions, in the memory of the network
+        xp = cp.get_array_module(device.voltage)
+        self.circuits.pop(slot, None)
+        if self.recording.admittance:
+            admittance = self.gather(device.admittance)
+            self.admittances[slot] = admittance
+
+            # the conductance is kept if it is not derived from the admittance
+            circuit = self.gather(device.circuit)
+            derived = self.derived(admittance)
+            if not np.allclose(circuit, derived, rtol=1e-5, atol=0):
+                self.circuits[slot] = circuit
+        voltage = device.voltage[xp.asarray(self.nodes)]
+        self.voltages[slot] = cp.asnumpy(voltage)
+
+        # the slot is appended to the lists if it is a new one
+        for values, value in ((self.stimuli, stimulus), (self.steps, step)):
+            values[slot:slot + 1] = [value]
+        self.recorded += 1
+        self.size = min(self.recorded, last or self.recorded)
+
+    def record(self, device: Nw):
+        """
+        Store the structure of the device and the entries of its junctions.
+
+        Parameters
+        ----------
+        device: Network
+            The device whose structure is stored
+        """
+
+        self.structure = copy(device)
+        if device.sparse:
+            # position of each junction entry and of its symmetric one
+            adjacency = self.structure.adjacency
+            positions = sp.csr_matrix((
+                np.arange(adjacency.nnz), adjacency.indices, adjacency.indptr
+            ), shape=adjacency.shape).T.tocsr()
+            positions.sort_indices()
+            upper = sparse_rows(adjacency) < adjacency.indices
+            self.rows = np.flatnonzero(upper)
+            self.columns = positions.data[upper]
+        else:
+            self.rows, self.columns = map(cp.asnumpy, device.junctions)
+
+        # the arrays of the ring buffer are allocated once
+        recording = self.recording
+        self.nodes = np.arange(device.nodes)
+        if recording.nodes is not None:
+            self.nodes = np.asarray(recording.nodes, dtype=int)
+
+        rows = recording.last or 0
+        edges = len(self.rows) if recording.admittance else 0
+        dtype = np.float16 if recording.half else device.admittance.dtype
+        self.admittances = np.empty((rows, edges), dtype=dtype)
+        self.voltages = np.empty(
+            (rows, len(self.nodes)), dtype=device.voltage.dtype
+        )
+
+    def gather(self, matrix: cp.ndarray | sp.spmatrix) -> np.ndarray:
+        """
+        Gather the entries of the device junctions from one of its matrices.
+
+        Parameters
+        ----------
+        matrix: cp.ndarray | sp.spmatrix
+            The matrix of the device, with the structure of the stored one
+        Returns
+        -------
+        The entry of each junction, in the host memory.
+        """
+
+        if sp.issparse(matrix):
+            return matrix.data[self.rows]
+        xp = cp.get_array_module(matrix)
+        rows, columns = xp.asarray(self.rows), xp.asarray(self.columns)
+        return cp.asnumpy(matrix[rows, columns])
+
+    def derived(self, admittance: np.ndarray) -> np.ndarray:
+        """
+        Calculate the conductance of the junctions from their admittance, as
+        in the conductance update.
+
+        Parameters
+        ----------
+        admittance: np.ndarray
+            The admittance of the junctions
+        Returns
+        -------
+        The conductance of the junctions.
+        """
+        datasheet = self.datasheet
+        return datasheet.Y_min + admittance * (
+            datasheet.Y_max - datasheet.Y_min
+        )
+
+    def instance(self, step: int) -> Nw:
+        """
+        Rebuild the network of a step of the history. The structure arrays
+        are shared by the networks of all the steps.
+
+        Parameters
+        ----------
+        step: int
+            The index of the step in the history
+        Returns
+        -------
+        The network, in the host memory, with the state of the step.
+        """
+
+        slot = self.slot(step)
+
+        structure = self.structure
+        adjacency = structure.adjacency
+        voltage = np.full_like(structure.voltage, np.nan)
+        voltage[self.nodes] = self.voltages[slot]
+
+        # the junctions state is not available if it is not recorded
+        junctions = conductance = np.nan
+        if self.recording.admittance:
+            junctions = self.admittances[slot]
+            conductance = self.circuits.get(slot)
+            if conductance is None:
+                conductance = self.derived(junctions)
+
+        # both the entries of each junction are set
+        if structure.sparse:
+            admittance = np.zeros_like(adjacency.data)
+            circuit = np.zeros_like(adjacency.data)
+            admittance[self.rows] = admittance[self.columns] = junctions
+            circuit[self.rows] = circuit[self.columns] = conductance
+            admittance, circuit = [sp.csr_matrix(
+                (_, adjacency.indices, adjacency.indptr), shape=adjacency.shape
+            ) for _ in (admittance, circuit)]
+        else:
+            admittance = np.zeros_like(adjacency)
+            circuit = np.zeros_like(adjacency)
+            rows, columns = self.rows, self.columns
+            admittance[rows, columns] = admittance[columns, rows] = junctions
+            circuit[rows, columns] = circuit[columns, rows] = conductance
+
+        network = Nw(
+            adjacency, structure.wires_position, structure.junctions_position,
+            circuit.astype(adjacency.dtype), admittance, voltage,
+            structure.device_grounds
+        )
+        network.topology = structure.topology
+        return network
+
+    def slot(self, step: int) -> int:
+        """
+        Returns the slot of the recorded arrays storing a step of the history.
+
+        Parameters
+        ----------
+        step: int
+            The index of the step in the history, from the oldest one
+        Returns
+        -------
+        The index of the slot of the step.
+        """
+
+        if not -self.size <= step < self.size:
+            raise IndexError('Step out of the history')
+        first = self.recorded - self.size
+        return (first + step % self.size) % len(self.stimuli)
+
+    @property
+    def instances(self) -> Sequence[Tuple[Nw, Dict[int, float]]]:
+        """
+        Returns the sequence of networks representing the evolution in time,
+        with their stimulus. The networks are rebuilt on access.
+
+        Returns
+        -------
+        A lazy sequence of pairs of network and stimulus.
+        """
+        return History(self)
 
     def currents_graphs(self, reverse: bool = False) -> Generator[Nw]:
         """
@@ -69,10 +332,12 @@ class Evolution:
         current matrix.
         """
 
-        graphs = reversed(self.instances) if reverse else self.instances
+        steps = range(self.size)
+        steps = reversed(steps) if reverse else steps
 
         def result():
-            for n, _ in graphs:
+            for step in steps:
+                n = self.instance(step)
                 n.currents = calculate_currents(n)
                 yield n
         return result()
@@ -93,28 +358,78 @@ class Evolution:
         A sequence of matrix containing the information centrality of each wire.
         """
 
-        graphs = [g for g, _ in self.instances]
-
-        if reverse:
-            graphs = reversed(graphs)
+        steps = range(self.size)
+        steps = reversed(steps) if reverse else steps
 
-        def _(network: Nw) -> cp.ndarray:
+        def _(step: int) -> cp.ndarray:
+            network = self.instance(step)
             centrality = nx.information_centrality(nn2nx(network), weight='Y')
             return cp.asarray(list(centrality.values()), dtype=cp.float32)
 
-        return map(_, graphs)
+        return map(_, steps)
 
     @property
-    def graph(self) -> Nw: return self.instances[-1][0]
+    def graph(self) -> Nw: return self.instance(self.size - 1)
 
     @property
-    def inputs(self) -> Dict[int, float]: return self.instances[-1][1]
+    def inputs(self) -> Dict[int, float]: return self.stimuli[self.slot(-1)]
 
     @property
     def sources(self) -> Set[int]: return set(self.inputs)
 
-    @cached_property
-    def duration(self): return range(len(self.instances))
+    @property
+    def duration(self): return range(self.size)
+
+    @property
+    def update_times(self):
+        steps = [self.steps[self.slot(_)] for _ in self.duration]
+        return [x * self.delta_time for x in steps]
+
+
+@dataclass
+class History(Sequence):
+    """
+    Lazy sequence of the steps of an evolution, as pairs of network and
+    stimulus. The networks are rebuilt at each access.
+
+    Fields
+    ------
+    evolution: Evolution
+        the evolution whose steps are accessed
+    """
+
+    evolution: Evolution
+
+    def __len__(self) -> int:
+        return self.evolution.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[_] for _ in range(*index.indices(len(self)))]
+        evolution = self.evolution
+        network = evolution.instance(index)
+        return network, evolution.stimuli[evolution.slot(index)]
+
+
+def grown(array: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns an array with at least the given number of rows, doubling the
+    allocated ones if they are not enough. The rows of the array are kept.
+
+    Parameters
+    ----------
+    array: np.ndarray
+        The array to grow
+    size: int
+        The number of needed rows
+    Returns
+    -------
+    The same array, if large enough, or a larger copy of it.
+    """
 
-    @cached_property
-    def update_times(self): return [x * self.delta_time for x in self.duration]
+    if size <= len(array):
+        return array
+    rows = max(size, 2 * len(array))
+    result = np.empty((rows, *array.shape[1:]), dtype=array.dtype)
+    result[:len(array)] = array
+    return result
@@ -1,10 +1,15 @@
-import cupy as cp
+from __future__ import annotations
 
+import numpy as np
+import scipy.sparse as sp
+
+from nn_simulator import backend as cp
 from nn_simulator.model.device.network import Network
 from nn_simulator.model.device.networks import to_cp
+from nn_simulator.model.utils import sparse_rows
 
 
-def delta_voltage(network: Network) -> cp.ndarray:
+def delta_voltage(network: Network) -> cp.ndarray | sp.csr_matrix:
     """
     Calculate delta voltage on a junction.
 
@@ -14,14 +19,24 @@ def delta_voltage(network: Network) -> cp.ndarray:
         target of the calculation
     Returns
     -------
-    An cupy ndarray representing the voltage difference on each junction.
+    An cupy ndarray representing the voltage difference on each junction. For
+    sparse networks, a CSR sparse matrix with the network structure.
     """
 
+    if network.sparse:
+        adj, voltage = network.adjacency, network.voltage
+        rows = sparse_rows(adj)
+        delta = voltage[rows] - adj.data * voltage[adj.indices]
+        return sp.csr_matrix(
+            (np.absolute(adj.data * delta), adj.indices, adj.indptr),
+            shape=adj.shape
+        )
+
     adj, voltage = to_cp(network.adjacency), to_cp(network.voltage)
     return cp.absolute(adj * (voltage.reshape(-1, 1) - adj * voltage))
 
 
-def calculate_currents(network: Network) -> cp.ndarray:
+def calculate_currents(network: Network) -> cp.ndarray | sp.csr_matrix:
     """
     Define currents in the network multiplying voltages and conductances.
 
@@ -32,6 +47,10 @@ def calculate_currents(network: Network) -> cp.ndarray:
     Returns
     -------
     A matrix with the current value specified in the node-node intersection.
+    For sparse networks, it is a CSR sparse matrix.
     """
 
+    if network.sparse:
+        return delta_voltage(network).multiply(network.circuit).tocsr()
+
     return to_cp(delta_voltage(network)) * to_cp(network.circuit)
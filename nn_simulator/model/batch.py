@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import numpy as np
+import scipy.sparse as sp
+
+from dataclasses import dataclass
+from nn_simulator import backend as cp
+from nn_simulator.model.device import Datasheet
+from nn_simulator.model.device.network import Network, copy
+from nn_simulator.model.solvers import symmetric_factorization
+from nn_simulator.model.stimulator import (
+    junctions_conductance, rate_coefficients, relaxed_admittance
+)
+from nn_simulator.model.utils import sparse_rows
+from scipy.sparse.linalg import splu
+from typing import Any, Dict
+
+
+@dataclass
+class Batch:
+    """
+    Contains the state of a batch of independent stimulations of the same
+    network. The state is stored for each entry of the network matrices (i.e.,
+    connections), with a leading batch dimension, in the memory of the network
+    arrays.
+
+    Fields
+    ------
+    network: Network
+        the network whose structure is shared by the batch
+    rows: cp.ndarray
+        first node of each entry of the network matrices
+    columns: cp.ndarray
+        second node of each entry of the network matrices
+    circuit: cp.ndarray
+        conductance of each entry, for each element of the batch
+    admittance: cp.ndarray
+        admittance of each entry, for each element of the batch
+    voltage: cp.ndarray
+        voltages of the circuit nodes, for each element of the batch
+    """
+
+    network: Network
+    rows: cp.ndarray
+    columns: cp.ndarray
+
+    circuit: cp.ndarray
+    admittance: cp.ndarray
+    voltage: cp.ndarray
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of elements of the batch.
+
+        Returns
+        -------
+        An integer representing the number of elements of the batch.
+        """
+        return len(self.voltage)
+
+
+def replicate(network: Network, size: int) -> Batch:
+    """
+    Create a batch of stimulations starting from the state of a network.
+    The network structure (e.g., loads connections) must not change while the
+    batch is in use.
+
+    Parameters
+    ----------
+    network: Network
+        The network to replicate
+    size: int
+        The number of elements of the batch
+    Returns
+    -------
+    A batch whose elements have the network state.
+    """
+
+    xp = cp.get_array_module(network.voltage)
+    if network.sparse:
+        rows = sparse_rows(network.adjacency)
+        columns = network.adjacency.indices.astype(rows.dtype)
+        circuit = network.circuit.data
+        admittance = network.admittance.data
+    else:
+        rows, columns = xp.nonzero(network.adjacency)
+        circuit = network.circuit[rows, columns]
+        admittance = network.admittance[rows, columns]
+
+    return Batch(
+        network, rows, columns,
+        circuit=xp.tile(circuit, (size, 1)),
+        admittance=xp.tile(admittance, (size, 1)),
+        voltage=xp.tile(network.voltage, (size, 1))
+    )
+
+
+def instance(batch: Batch, index: int) -> Network:
+    """
+    Extract an element of the batch as a network.
+
+    Parameters
+    ----------
+    batch: Batch
+        The batch from which extract the element
+    index: int
+        The index of the element in the batch
+    Returns
+    -------
+    A network with the structure of the batch one and the element state.
+    """
+
+    network = copy(batch.network, ram=False)
+    if network.sparse:
+        network.circuit.data[:] = batch.circuit[index]
+        network.admittance.data[:] = batch.admittance[index]
+    else:
+        network.circuit[batch.rows, batch.columns] = batch.circuit[index]
+        network.admittance[batch.rows, batch.columns] = batch.admittance[index]
+    network.voltage = batch.voltage[index].copy()
+    return network
+
+
+def stimulate_batch(
+        batch: Batch,
+        datasheet: Datasheet,
+        delta_time: float,
+        inputs: Dict[int, Any]
+):
+    """
+    Stimulate all the elements of the batch through voltage-inputs on given
+    pins. The function directly modify the passed batch.
+
+    Parameters
+    ----------
+    batch: Batch
+        The batch to stimulate
+    datasheet: Datasheet
+        The datasheet of the characteristics of the device
+    delta_time: float
+        The time elapsed from the last update
+    inputs: Dict[int, Any]
+        Pair of source/nodes with, for each, the voltage value of each element
+        of the batch (a scalar value is applied to all of them)
+    """
+
+    # update weights of the edges. they need to be initialized
+    update_batch_conductance(batch, datasheet, delta_time)
+
+    # update voltage values of the nodes of the system after the stimulation
+    batch_voltage_node_analysis(batch, inputs)
+
+
+def update_batch_conductance(
+        batch: Batch,
+        datasheet: Datasheet,
+        delta_time: float
+):
+    """
+    Update weights of the nanowires junctions of all the elements of the
+    batch. The update is the same of `update_conductance`.
+
+    Parameters
+    ----------
+    batch: Batch
+        The batch of which update the conductance
+    datasheet: Datasheet
+        The device specification
+    delta_time: float
+        Time elapsed from the last update
+    """
+
+    xp = cp.get_array_module(batch.voltage)
+    network = batch.network
+
+    # consider only the device junctions, i.e., exclude the external grounds
+    device = network.nodes - network.external_grounds
+    junctions = (batch.rows < device) & (batch.columns < device)
+    rows, columns = batch.rows[junctions], batch.columns[junctions]
+
+    if network.sparse:
+        A = network.adjacency.data[junctions]
+    else:
+        A = network.adjacency[rows, columns]
+    G = batch.admittance[:, junctions]
+    V = batch.voltage
+
+    # calculate delta voltage on a junction
+    delta_v = xp.absolute(V[:, rows] - A * V[:, columns])
+    kp, kd = xp.empty_like(delta_v), xp.empty_like(delta_v)
+
+    # same kernel of `update_conductance`, broadcast on the batch dimension
+    rate_coefficients(datasheet, delta_v, kp, kd, out=delta_v)
+    admittance = xp.empty_like(delta_v)
+    relaxed_admittance(delta_time, delta_v, kp, kd, G, A, out=admittance)
+    batch.admittance[:, junctions] = admittance
+    junctions_conductance(datasheet, admittance, A, out=admittance)
+    batch.circuit[:, junctions] = admittance
+
+
+def batch_voltage_node_analysis(batch: Batch, inputs: Dict[int, Any]):
+    """
+    Calculate the voltages of all the elements of the batch. The sources and
+    the grounds are eliminated from the nodal systems (see `reduced_spd`),
+    that are solved all together as a block-diagonal one. If the elements
+    share the conductances, the system is factorized once and solved for all
+    the elements inputs.
+
+    Parameters
+    ----------
+    batch: Batch
+        The batch of the nanowire network circuits
+    inputs: Dict[int, Any]
+        Pair of source/nodes with, for each, the voltage value of each element
+        of the batch (a scalar value is applied to all of them)
+    """
+
+    network, size, nodes = batch.network, batch.size, batch.network.nodes
+    rows, columns = cp.asnumpy(batch.rows), cp.asnumpy(batch.columns)
+    conductances = cp.asnumpy(batch.circuit).astype(np.float64)
+
+    # voltages of the nodes: the grounds stay at 0V
+    sources = sorted(inputs)
+    x = np.zeros((size, nodes))
+    for source in sources:
+        x[:, source] = cp.asnumpy(inputs[source])
+
+    free = np.ones(nodes, dtype=bool)
+    free[sources] = False
+    free[network.wires:] = False
+    free = np.flatnonzero(free)
+
+    shared = (conductances == conductances[:1]).all()
+    systems = 1 if shared else size
+
+    # block-diagonal Laplacian of the systems: the diagonal stores the sum of
+    # the conductances incident on a node
+    offsets = nodes * np.arange(systems).reshape(-1, 1)
+    L = sp.csr_matrix((
+        conductances[:systems].ravel(),
+        ((rows + offsets).ravel(), (columns + offsets).ravel())
+    ), shape=(systems * nodes, systems * nodes))
+    L = sp.diags(np.asarray(L.sum(axis=1)).ravel()) - L
+
+    # reduce the systems to the nodes of unknown voltage, moving the known
+    # voltages to the known terms
+    unknown = (free + offsets).ravel()
+    L = L.tocsr()[unknown]
+    A = L[:, unknown]
+
+    # shared conductances solve a single system with a column for each element
+    if shared:
+        x[:, free] = symmetric_factorization(A).solve(-(L @ x.T)).T
+    else:
+        x[:, free] = block_solution(A, -(L @ x.ravel()), size)
+
+    xp = cp.get_array_module(batch.voltage)
+    batch.voltage = xp.asarray(x)
+
+
+def block_solution(A: sp.csr_matrix, b: np.ndarray, blocks: int) -> np.ndarray:
+    """
+    Solve a block-diagonal symmetric positive-definite system whose blocks
+    share the same structure. The fill-reducing ordering of the first block is
+    computed once and applied to all of them.
+
+    Parameters
+    ----------
+    A: sp.csr_matrix
+        The block-diagonal matrix of the system
+    b: np.ndarray
+        The known-terms vector
+    blocks: int
+        The number of blocks of the system
+    Returns
+    -------
+    The solution of the system, with a row for each block.
+    """
+
+    n = A.shape[0] // blocks
+    order = np.argsort(symmetric_factorization(A[:n, :n]).perm_c)
+    order = (order + n * np.arange(blocks).reshape(-1, 1)).ravel()
+    factorization = splu(
+        A[order][:, order].tocsc(), permc_spec='NATURAL', diag_pivot_thresh=0,
+        options=dict(SymmetricMode=True)
+    )
+
+    solution = np.empty(len(order))
+    solution[order] = factorization.solve(b[order])
+    return solution.reshape(blocks, -1)
@@ -0,0 +1,147 @@
+import numpy as np
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from nn_simulator.controller import cache
+from nn_simulator.logger import logger
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import largest_connected_component
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.device.wires import NoJunctionsError
+from os import cpu_count
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+SUMMARY_TYPE = np.dtype([
+    ('index', np.int64),
+    ('seed', np.int64),
+    ('wires', np.int64),
+    ('junctions', np.int64),
+    ('lcc_wires', np.int64),
+    ('lcc_junctions', np.int64)
+])
+
+
+def ensemble(
+        datasheets: Iterable[Datasheet],
+        processes: int = None,
+        cached: Dict[str, Any] = None
+) -> Iterator[np.void]:
+    """
+    Generate the devices described by a sequence of datasheets in a pool of
+    processes. Each device is summarized in the worker process, so that only
+    a compact record is returned and no adjacency matrix is kept in memory.
+    To use the devices, the workers can store their sparse networks in the
+    cache, from which they are read back by `cache.generate` with the same
+    arguments. The datasheets are consumed lazily.
+
+    Parameters
+    ----------
+    datasheets: Iterable[Datasheet]
+        The technical description of the devices
+    processes: int
+        Number of worker processes. By default, the number of available CPUs
+    cached: Dict[str, Any]
+        Keyword arguments of `cache.generate` (e.g., initial_conductance and
+        directory) used to store the networks in the cache. If None, the
+        networks are not stored
+    Returns
+    -------
+    A lazy sequence of SUMMARY_TYPE records, in order of completion. The index
+    field is the position of the datasheet in the input sequence.
+    """
+
+    datasheets = enumerate(datasheets)
+    processes = processes or cpu_count()
+
+    with ProcessPoolExecutor(processes) as executor:
+
+        # keep a bounded number of pending devices
+        def submit(count: int):
+            return {
+                executor.submit(summarize, index, datasheet, cached)
+                for index, datasheet in islice(datasheets, count)
+            }
+
+        pending = submit(2 * processes)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= submit(len(done))
+            for future in done:
+                yield np.array(future.result(), dtype=SUMMARY_TYPE)[()]
+
+
+def summary(
+        datasheets: Iterable[Datasheet],
+        processes: int = None,
+        cached: Dict[str, Any] = None
+) -> np.ndarray:
+    """
+    Generate the devices described by a sequence of datasheets in a pool of
+    processes and collect their summaries.
+
+    Parameters
+    ----------
+    datasheets: Iterable[Datasheet]
+        The technical description of the devices
+    processes: int
+        Number of worker processes. By default, the number of available CPUs
+    cached: Dict[str, Any]
+        Keyword arguments of `cache.generate` used to store the networks in
+        the cache. If None, the networks are not stored
+    Returns
+    -------
+    A structured numpy array of SUMMARY_TYPE, in the order of the datasheets.
+    """
+
+    logger.info('Generating devices ensemble')
+
+    table = np.array(
+        [*ensemble(datasheets, processes, cached)], dtype=SUMMARY_TYPE
+    )
+    return np.sort(table, order='index')
+
+
+def summarize(
+        index: int,
+        datasheet: Datasheet,
+        cached: Dict[str, Any] = None
+) -> Tuple[int, ...]:
+    """
+    Generate a device and summarize its structure. A device without junctions
+    is summarized with zero junctions, instead of failing the whole ensemble.
+
+    Parameters
+    ----------
+    index: int
+        The position of the datasheet in the ensemble
+    datasheet: Datasheet
+        The technical description of the device
+    cached: Dict[str, Any]
+        Keyword arguments of `cache.generate` used to store the network in the
+        cache. If None, the network is not stored
+    Returns
+    -------
+    A tuple with the index, the seed, the number of wires and junctions of the
+    device, and the number of wires and junctions of its largest connected
+    component.
+    """
+
+    try:
+        if cached is None:
+            wires_dict = generate_network_data(datasheet, sparse=True)
+        else:
+            _, wires_dict = cache.generate(
+                datasheet, **{**cached, 'sparse': True}
+            )
+    except NoJunctionsError:
+        logger.warning('Device %d has no junctions', index)
+        wires = datasheet.wires_count
+        return index, datasheet.seed, wires, 0, min(wires, 1), 0
+
+    graph, _ = largest_connected_component(wires_dict['adj_matrix'])
+
+    return (
+        index, datasheet.seed,
+        wires_dict['number_of_wires'], wires_dict['number_of_junctions'],
+        graph.shape[0], graph.nnz // 2
+    )
@@ -1,7 +1,11 @@
-import cupy as cp
+from __future__ import annotations
+
 import numpy as np
+import scipy.sparse as sp
 
+from nn_simulator import backend as cp
 from nn_simulator.model.device.network import Network
+from nn_simulator.model.device.networks import to_cp
 from scipy.sparse.csgraph import connected_components
 from typing import Dict, Any, List, Tuple
 
@@ -9,7 +13,8 @@ from typing import Dict, Any, List, Tuple
 def nanowire_network(
         network_data: Dict[str, Any],
         initial_conductance: float,
-        grounds: int = 0
+        grounds: int = 0,
+        sparse: bool = False
 ) -> Network:
     """
     Generate a nanowire network according to a dictionary (a.k.a., wires_dict)
@@ -18,82 +23,95 @@ def nanowire_network(
     Parameters
     ----------
     network_data: Dict[str, any]
-        the dictionary description of the network
+        the dictionary description of the network. The adjacency matrix can be
+        either dense or sparse
     initial_conductance: float
         the float value to set as conductance
     grounds: int
         number of network nodes to be considered grounds. They are the rightmost
         and bottommost ones of the resulting matrix
+    sparse: bool
+        if True, a sparse network is created, with CSR sparse matrices and
+        numpy arrays. The network data is converted if needed
     Returns
     -------
     A Network instance of the largest connected component.
     """
 
     # get largest connected component of the network
-    graph, mask = largest_connected_component(network_data['adj_matrix'])
-
-    # create a matrix to store x and y positions of a wire
-    wx, wy = tuple(cp.zeros_like(network_data['adj_matrix']) for _ in range(2))
-    for matrix, _ in zip((wx, wy), ('xc', 'yc')):
-        cp.fill_diagonal(matrix, network_data[_])
-
-    # reduce the matrix to the largest component one
-    wx, wy = [clear_matrix(_, mask) for _ in (wx, wy)]
-
-    # create a matrix to store x and y positions of a wires junction
-    adj = np.matrix.flatten(np.triu(network_data['adj_matrix']))
-
-    # set the junctions position
-    jx, jy = [cp.reshape(
-        cp.asarray([
-            next(_0)
-            if _1 != 0 else 0
-            for _1 in adj
-        ], dtype=cp.float32),
-        network_data['adj_matrix'].shape
-    ) for _0 in [
-        iter(network_data[k]) for k in ('xi', 'yi')
-    ]]
-
-    # mirror upper-diagonal of the matrix below
-    jx, jy = jx + jx.T - np.diag(np.diag(jx)), jy + jy.T - np.diag(np.diag(jy))
-
-    # reduce the matrix to the largest component one
-    jx, jy = [clear_matrix(_, mask) for _ in (jx, jy)]
+    adjacency = network_data['adj_matrix']
+    if sparse:
+        adjacency = sp.csr_matrix(adjacency)
+    graph, mask = largest_connected_component(adjacency)
+    keep = np.logical_not(mask)
+
+    # sparse networks stay in the RAM
+    xp = np if sparse else cp
+
+    # reduce the wires positions to the largest component ones
+    wx, wy = [
+        xp.asarray(network_data[_][keep], dtype=xp.float32)
+        for _ in ('xc', 'yc')
+    ]
+
+    # get the junctions of the largest component. the edge list is sorted and
+    # the reduction keeps the nodes order: they follow `Network.junctions`
+    edges = network_data['edge_list'].astype(np.int64)
+    inside = keep[edges[:, 0]] & keep[edges[:, 1]]
+    jx, jy = [
+        xp.asarray(network_data[_][inside], dtype=xp.float32)
+        for _ in ('xi', 'yi')
+    ]
+
+    # set the initial conductance of the system sharing the graph structure
+    if sparse:
+        return Network(
+            adjacency=graph,
+            wires_position=(wx, wy),
+            junctions_position=(jx, jy),
+            circuit=structured(graph, initial_conductance),
+            admittance=structured(graph, 0),
+            voltage=np.zeros(graph.shape[0]),
+            device_grounds=grounds
+        )
 
     # set the initial conductance of the system on non-zero junctions
+    graph = to_cp(graph)
     circuit = initial_conductance * (graph != 0)
 
-    # save adjacency matrix of reduced network
+    # save adjacency matrix of reduced network. the matrices are kept
+    # contiguous, for the in place update of their junctions
     return Network(
-        adjacency=cp.asarray(graph, dtype=cp.float32),
+        adjacency=cp.ascontiguousarray(graph, dtype=cp.float32),
         wires_position=(wx, wy),
         junctions_position=(jx, jy),
-        circuit=cp.asarray(circuit, dtype=cp.float32),
-        admittance=cp.zeros_like(circuit),
+        circuit=cp.ascontiguousarray(circuit, dtype=cp.float32),
+        admittance=cp.zeros(circuit.shape, dtype=circuit.dtype),
         voltage=cp.zeros(len(circuit)),
         device_grounds=grounds
     )
 
 
 def largest_connected_component(
-        graph: np.ndarray
-) -> Tuple[np.ndarray, List[bool]]:
+        graph: np.ndarray | sp.spmatrix
+) -> Tuple[np.ndarray | sp.spmatrix, List[bool]]:
     """
     Extract the largest connected component from the matrix.
 
     Parameters
     ----------
-    graph: np.ndarray
+    graph: np.ndarray | sp.spmatrix
         the adjacency matrix that represents the network
     Returns
     -------
-    The matrix of the largest connected component.
+    The matrix of the largest connected component. It is sparse if the input
+    one is sparse.
     The mask of the removed nodes.
     """
 
     # get list of nodes membership in the graph
-    _, labels = connected_components(cp.asnumpy(graph), directed=False)
+    graph = graph if sp.issparse(graph) else cp.asnumpy(graph)
+    _, labels = connected_components(graph, directed=False)
 
     # count nodes of each component
     unique_labels, count = np.unique(labels, return_counts=True)
@@ -106,23 +124,56 @@ def largest_connected_component(
     return clear_matrix(graph, mask), mask
 
 
-def clear_matrix(matrix: np.ndarray, mask: List[int]) -> cp.ndarray:
+def clear_matrix(
+        matrix: np.ndarray | sp.spmatrix,
+        mask: List[int]
+) -> cp.ndarray | sp.csr_matrix:
     """
     Clear a matrix removing the nodes (i.e., columns and rows) specified by the
     mask.
 
     Parameters
     ----------
-    matrix: np.ndarray
+    matrix: np.ndarray | sp.spmatrix
         the matrix to clean
     mask: cp.ndarray
         the boolean mask that specify the elements to remove. A value of true
         means a removal
     Returns
     -------
-    A cupy ndarray cleaned by all the exceeding nodes.
+    A cupy ndarray cleaned by all the exceeding nodes. If the input matrix is
+    sparse, a CSR sparse matrix is returned instead.
     """
 
+    if sp.issparse(matrix):
+        keep = np.logical_not(mask)
+        matrix = matrix.tocsr()[keep][:, keep].astype(np.float32)
+        matrix.sort_indices()
+        return matrix
+
     matrix = np.delete(cp.asnumpy(matrix), mask, 0)
     matrix = np.delete(matrix, mask, 1)
     return cp.asarray(matrix, dtype=cp.float32)
+
+
+def structured(matrix: sp.csr_matrix, value: float) -> sp.csr_matrix:
+    """
+    Create a CSR sparse matrix with the same structure of the given one, i.e.,
+    with the same non-zero entries, all set to the specified value. The entries
+    are stored also if the value is zero.
+
+    Parameters
+    ----------
+    matrix: sp.csr_matrix
+        the matrix of which take the structure
+    value: float
+        the value of the non-zero entries
+    Returns
+    -------
+    A CSR sparse matrix with the same structure of the input one.
+    """
+
+    data = np.full(matrix.nnz, value, dtype=np.float32)
+    return sp.csr_matrix(
+        (data, matrix.indices.copy(), matrix.indptr.copy()), shape=matrix.shape
+    )
@@ -1,24 +1,36 @@
 from __future__ import annotations
 
-import cupy as cp
+import numpy as np
+import scipy.sparse as sp
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import count
+from nn_simulator import backend as cp
 from typing import Tuple
 
+# source of the unique identifiers of the networks topologies
+topologies = count()
+
 
 @dataclass
 class Network:
     """
     Contains the state of the nanowire network.
+    The network is sparse if its matrices are scipy CSR sparse matrices. In that
+    case, adjacency, circuit and admittance share the same structure, so that
+    the junctions state is stored as vectors of their non-zero entries, and all
+    the arrays are numpy ones.
 
     Fields
     ------
     adjacency: cp.ndarray
         adjacency (i.e., connections) matrix of the device
     wires_position: Tuple[cp.ndarray, cp.ndarray]
-        x and y position of the wires
+        x and y position of the wires, as vectors with an element for each node
+        of the device (i.e., external grounds excluded)
     junctions_position: Tuple[cp.ndarray, cp.ndarray]
-        x and y position of the wires junctions
+        x and y position of the wires junctions, as vectors with an element for
+        each junction of the device, in the order of `junctions`
     circuit: cp.ndarray
         adjacency matrix with conductances instead of 1s
     admittance: cp.ndarray
@@ -28,6 +40,13 @@ class Network:
     grounds: int
         specify the number of nodes to be considered ground (those have to be at
         the rightmost part of the matrix)
+    reserved_grounds: int
+        number of the first external grounds that are kept as slots for the
+        loads when they are disconnected (see `connector.reserve`); a slot
+        without a load is a ground with no connections
+    topology: int
+        identifier of the network connections, renewed at each of their changes
+        (e.g., connection of a load); it is not an initialization parameter
     """
 
     adjacency: cp.ndarray
@@ -40,6 +59,12 @@ class Network:
 
     device_grounds: int = 0
     external_grounds: int = 0
+    reserved_grounds: int = 0
+
+    topology: int = field(
+        default_factory=lambda: next(topologies),
+        init=False, repr=False, compare=False
+    )
 
     @property
     def device(self) -> Network:
@@ -54,7 +79,7 @@ class Network:
         """
         if not self.external_grounds:
             return self
-        return Network(
+        device = Network(
             self.adjacency[:-self.external_grounds, :-self.external_grounds],
             self.wires_position, self.junctions_position,
             self.circuit[:-self.external_grounds, :-self.external_grounds],
@@ -62,6 +87,36 @@ class Network:
             self.voltage[:-self.external_grounds],
             self.device_grounds, external_grounds=0
         )
+        device.topology = self.topology
+        return device
+
+    @property
+    def junctions(self) -> Tuple[cp.ndarray, cp.ndarray]:
+        """
+        Returns the junctions of the device (i.e., external grounds excluded) as
+        the lower and higher index of the two connected nodes. The junctions
+        are sorted by the first and then by the second node.
+
+        Returns
+        -------
+        A tuple with the vectors of the first and second node of each junction.
+        """
+        if self.sparse:
+            junctions = sp.triu(self.device.adjacency, format='csr')
+            junctions.sort_indices()
+            return junctions.nonzero()
+        return cp.nonzero(cp.triu(self.device.adjacency))
+
+    @property
+    def sparse(self) -> bool:
+        """
+        Returns True if the matrices of the network are sparse ones.
+
+        Returns
+        -------
+        A boolean specifying if the network matrices are sparse.
+        """
+        return sp.issparse(self.adjacency)
 
     @property
     def nodes(self) -> int:
@@ -73,7 +128,7 @@ class Network:
         An integer representing the number of different nodes of the circuit:
             # wires + # grounds
         """
-        return len(self.adjacency)
+        return self.adjacency.shape[0]
 
     @property
     def wires(self) -> int:
@@ -116,18 +171,23 @@ def copy(network: Network, ram: bool = True) -> Network:
     xw, yw = network.wires_position
     xj, yj = network.junctions_position
 
-    adj = cp.asnumpy(network.adjacency) if ram else network.adjacency.copy()
-    wp = (
-        cp.asnumpy(xw) if ram else xw.copy(),
-        cp.asnumpy(yw) if ram else yw.copy()
-    )
-    jp = (
-        cp.asnumpy(xj) if ram else xj.copy(),
-        cp.asnumpy(yj) if ram else yj.copy()
-    )
-    circuit = cp.asnumpy(network.circuit) if ram else network.circuit.copy()
-    adm = cp.asnumpy(network.admittance) if ram else network.admittance.copy()
-    voltage = cp.asnumpy(network.voltage) if ram else network.voltage.copy()
+    # arrays already in the RAM (e.g., sparse or numpy ones) are copied
+    def _(array):
+        if ram and cp.get_array_module(array) is not np:
+            return cp.asnumpy(array)
+        return array.copy()
+
+    adj = _(network.adjacency)
+    wp = (_(xw), _(yw))
+    jp = (_(xj), _(yj))
+    circuit = _(network.circuit)
+    adm = _(network.admittance)
+    voltage = _(network.voltage)
 
     d_grounds, e_grounds = network.device_grounds, network.external_grounds
-    return Network(adj, wp, jp, circuit, adm, voltage, d_grounds, e_grounds)
+    copied = Network(
+        adj, wp, jp, circuit, adm, voltage, d_grounds, e_grounds,
+        network.reserved_grounds
+    )
+    copied.topology = network.topology
+    return copied
@@ -1,17 +1,21 @@
-import cupy as cp
+from __future__ import annotations
+
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 
+from nn_simulator import backend as cp
 from nn_simulator.logger import logger
 from nn_simulator.model.device.datasheet.Datasheet import Datasheet
 from nn_simulator.model.device.network import Network
 from nn_simulator.model.device.wires import detect_junctions
 from nn_simulator.model.device.wires import generate_adj_matrix
 from nn_simulator.model.device.wires import generate_wires_distribution
+from nn_simulator.model.utils import sparse_rows
 from typing import Dict
 
 
-def generate_network_data(datasheet: Datasheet) -> Dict:
+def generate_network_data(datasheet: Datasheet, sparse: bool = False) -> Dict:
     """
     Generate the data of the network according to the datasheet specifications.
 
@@ -19,6 +23,8 @@ def generate_network_data(datasheet: Datasheet) -> Dict:
     ----------
     datasheet: Datasheet
         the technical description of the nanowire network
+    sparse: bool
+        if True, the adjacency matrix is a scipy CSR sparse matrix
     Returns
     -------
     A dictionary with the physical information about the nanowire network.
@@ -42,7 +48,7 @@ def generate_network_data(datasheet: Datasheet) -> Dict:
     detect_junctions(wires_dict)
 
     # generate graph object and adjacency matrix
-    generate_adj_matrix(wires_dict)
+    generate_adj_matrix(wires_dict, sparse)
 
     return wires_dict
 
@@ -61,33 +67,44 @@ def nn2nx(network: Network) -> nx.Graph:
     nodes and edges as fields.
     """
 
-    graph = nx.from_numpy_matrix(network.adjacency)
+    if network.sparse:
+        # the explicit zeros of the reserved slots are not connections
+        adjacency = network.adjacency.copy()
+        adjacency.eliminate_zeros()
+        graph = nx.from_scipy_sparse_matrix(adjacency)
+    else:
+        graph = nx.from_numpy_matrix(to_np(network.adjacency))
 
     # add wire voltage to nodes
+    voltage = to_np(network.voltage)
     for n in graph.nodes():
-        graph.nodes[n]['V'] = float(network.voltage[n])
+        graph.nodes[n]['V'] = float(voltage[n])
 
     # add junction tension to edge
     for u, v in graph.edges():
-        graph[u][v]['V'] = float(network.voltage[u] - network.voltage[v])
+        graph[u][v]['V'] = float(voltage[u] - voltage[v])
 
     # add junction conductance and admittance to edge
-    for u, v in graph.edges():
-        graph[u][v]['Y'] = float(network.circuit[u, v])
-        graph[u][v]['g'] = float(network.admittance[u, v])
-
-    # add wires position to node
-    xs, ys = network.wires_position
+    us, vs = np.array(graph.edges(), dtype=np.int64).reshape(-1, 2).T
+    circuit, admittance = [
+        np.asarray(_[us, vs]).ravel() if network.sparse else to_np(_)[us, vs]
+        for _ in (network.circuit, network.admittance)
+    ]
+    for i, (u, v) in enumerate(zip(us, vs)):
+        graph[u][v]['Y'] = float(circuit[i])
+        graph[u][v]['g'] = float(admittance[i])
+
+    # add wires position to node. external grounds have no position
+    xs, ys = map(to_np, network.wires_position)
     for n in graph.nodes():
-        x = xs[n, n] if n < xs.shape[0] and n < xs.shape[1] else 0
-        y = ys[n, n] if n < ys.shape[0] and n < ys.shape[1] else 0
+        x, y = (xs[n], ys[n]) if n < len(xs) else (0, 0)
         graph.nodes[n]['pos'] = float(x), float(y)
 
-    # add junction position to edge
-    xs, ys = network.junctions_position
+    # add junction position to edge. external loads have no position
+    xs, ys = map(to_np, network.junctions_position)
+    positions = dict(zip(zip(*map(to_np, network.junctions)), zip(xs, ys)))
     for u, v in graph.edges():
-        x = xs[u, v] if u < xs.shape[0] and v < xs.shape[1] else 0
-        y = ys[u, v] if u < ys.shape[0] and v < ys.shape[1] else 0
+        x, y = positions.get((min(u, v), max(u, v)), (0, 0))
         graph[u][v]['jx_pos'] = float(x), float(y)
 
     # add ground label to node
@@ -99,7 +116,7 @@ def nn2nx(network: Network) -> nx.Graph:
     return graph
 
 
-def nx2nn(graph: nx.Graph) -> Network:
+def nx2nn(graph: nx.Graph, sparse: bool = False) -> Network:
     """
     Converts a Networkx graph from the matrix format to a nanowire network.
 
@@ -108,46 +125,75 @@ def nx2nn(graph: nx.Graph) -> Network:
     graph: nx.Graph
         a Networkx graph with all the information (voltage, conductance, etc.)
         in nodes and edges as fields
+    sparse: bool
+        if True, a sparse network is created
     Returns
     -------
     Matrix format of the nanowire network.
     """
 
-    adjacency = cp.asarray(nx.to_numpy_array(graph), dtype=cp.float32)
-
-    # get wires position from node
-    wx, wy = cp.zeros_like(adjacency), cp.zeros_like(adjacency)
-    for n in graph.nodes():
-        wx[n, n], wy[n, n] = graph.nodes[n]['pos']
-
-    # add junction position to edge
-    jx, jy = cp.zeros_like(adjacency), cp.zeros_like(adjacency)
-    for u, v in graph.edges():
-        jx[v, u], jy[v, u] = jx[u, v], jy[u, v] = graph[u][v]['jx_pos']
-
-    # get junction conductance to edge
-    circuit, admittance = cp.zeros_like(adjacency), cp.zeros_like(adjacency)
-    for u, v in graph.edges():
-        edge = graph[u][v]
-        circuit[u, v] = circuit[v, u] = edge['Y'] if 'Y' in edge else 0
-        admittance[u, v] = admittance[v, u] = edge['g'] if 'g' in edge else 0
+    if sparse:
+        adjacency = nx.to_scipy_sparse_matrix(
+            graph, dtype=np.float32, format='csr'
+        )
+        adjacency.sort_indices()
+    else:
+        adjacency = nx.to_numpy_array(graph, dtype=np.float32)
 
     # get ground label from node
     d_grounds = sum(1 for _ in graph.nodes() if 'ground' in graph.nodes[_])
     e_grounds = sum(1 for _ in graph.nodes() if 'external' in graph.nodes[_])
 
+    # get wires position from node. external grounds have no position
+    nodes = adjacency.shape[0] - e_grounds
+    wx, wy = np.zeros(nodes, np.float32), np.zeros(nodes, np.float32)
+    for n in range(nodes):
+        wx[n], wy[n] = graph.nodes[n]['pos']
+
+    # get junction position from edge, in the order of the device junctions
+    if sparse:
+        junctions = sp.triu(adjacency[:nodes, :nodes], format='csr')
+        junctions.sort_indices()
+        rows, columns = junctions.nonzero()
+    else:
+        rows, columns = np.nonzero(np.triu(adjacency[:nodes, :nodes]))
+    jx, jy = np.zeros(len(rows), np.float32), np.zeros(len(rows), np.float32)
+    for i, (u, v) in enumerate(zip(rows, columns)):
+        jx[i], jy[i] = graph[u][v]['jx_pos']
+
+    # get junction conductance to edge
+    if sparse:
+        rows = sparse_rows(adjacency)
+        edges = [graph[u][v] for u, v in zip(rows, adjacency.indices)]
+        circuit, admittance = [
+            sp.csr_matrix((
+                np.array([_.get(key, 0) for _ in edges], dtype=np.float32),
+                adjacency.indices.copy(), adjacency.indptr.copy()
+            ), shape=adjacency.shape)
+            for key in ('Y', 'g')
+        ]
+    else:
+        circuit, admittance = np.zeros_like(adjacency), np.zeros_like(adjacency)
+        for u, v in graph.edges():
+            edge = graph[u][v]
+            circuit[u, v] = circuit[v, u] = edge.get('Y', 0)
+            admittance[u, v] = admittance[v, u] = edge.get('g', 0)
+
     # get wire voltage to nodes and set grounds
-    voltage = cp.zeros(len(adjacency))
+    voltage = np.zeros(adjacency.shape[0])
     for n in graph.nodes():
         voltage[n] = graph.nodes[n]['V'] if 'V' in graph.nodes[n] else 0
 
+    # sparse networks stay in the RAM
+    def _(array): return array if sparse else cp.asarray(array)
+
     network = Network(
-        adjacency=adjacency,
-        wires_position=(wx, wy),
-        junctions_position=(jx, jy),
-        circuit=circuit,
-        admittance=admittance,
-        voltage=voltage,
+        adjacency=_(adjacency),
+        wires_position=(_(wx), _(wy)),
+        junctions_position=(_(jx), _(jy)),
+        circuit=_(circuit),
+        admittance=_(admittance),
+        voltage=_(voltage),
         device_grounds=d_grounds,
         external_grounds=e_grounds
     )
@@ -155,35 +201,41 @@ def nx2nn(graph: nx.Graph) -> Network:
     return network
 
 
-def to_np(array: np.ndarray | cp.ndarray) -> np.ndarray:
+def to_np(array: np.ndarray | cp.ndarray | sp.spmatrix) -> np.ndarray:
     """
     Ensure that the given array is numpy one. If it's not, it is converted.
+    Sparse matrices are converted to dense ones.
 
     Parameters
     ----------
-    array: np.ndarray | cp.ndarray
+    array: np.ndarray | cp.ndarray | sp.spmatrix
         The array that is wanted to be a numpy one
     Returns
     -------
     A numpy version of the input array.
     """
 
+    if sp.issparse(array):
+        return array.toarray()
     return cp.asnumpy(array) if isinstance(array, cp.ndarray) else array
 
 
-def to_cp(array: np.ndarray | cp.ndarray) -> cp.ndarray:
+def to_cp(array: np.ndarray | cp.ndarray | sp.spmatrix) -> cp.ndarray:
     """
     Ensure that the given array is cupy one. If it's not, it is converted.
+    Sparse matrices are converted to dense ones.
 
     Parameters
     ----------
-    array: np.ndarray | cp.ndarray
+    array: np.ndarray | cp.ndarray | sp.spmatrix
         The array that is wanted to be a numpy one
     Returns
     -------
     A cupy version of the input array.
     """
 
+    if sp.issparse(array):
+        array = array.toarray()
     if isinstance(array, np.ndarray):
         return cp.asarray(array, dtype=cp.float32)
     return array
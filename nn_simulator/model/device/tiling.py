@@ -0,0 +1,264 @@
+import numpy as np
+import os
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from glob import glob
+from nn_simulator.logger import logger
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.wires import NoJunctionsError
+from nn_simulator.model.device.wires import candidate_pairs, intersections
+from nn_simulator.model.device.wires import generate_wires_distribution
+from typing import Any, Dict, Iterator, Tuple
+
+__CHUNK_FILE = 'junctions_%05d.npz'
+__CHUNK_PATTERN = 'junctions_*.npz'
+
+
+def generate_network_data_tiled(
+        datasheet: Datasheet,
+        directory: str,
+        tiles: int = 4,
+        processes: int = None
+) -> Dict:
+    """
+    Generate the data of the network according to the datasheet specifications,
+    detecting the junctions tile by tile in a pool of processes. The junctions
+    are streamed to the given directory as chunks of edges and are not kept in
+    memory: use `load_junctions` or `junctions_chunks` to read them.
+
+    Parameters
+    ----------
+    datasheet: Datasheet
+        the technical description of the nanowire network
+    directory: str
+        the directory where to save the junctions chunks
+    tiles: int
+        number of tiles on each side of the device
+    processes: int
+        number of worker processes. By default, the number of available CPUs
+    Returns
+    -------
+    A dictionary with the physical information about the nanowire network,
+    except for the junctions.
+    """
+
+    logger.info('Generating network data by tiles')
+
+    # generate the network
+    wires_dict = generate_wires_distribution(
+        number_of_wires=datasheet.wires_count,
+        wire_av_length=datasheet.mean_length,
+        wire_dispersion=datasheet.std_length,
+        general_normal_shape=10,
+        centroid_dispersion=datasheet.centroid_dispersion,
+        seed=datasheet.seed,
+        Lx=datasheet.Lx,
+        Ly=datasheet.Ly
+    )
+
+    # get junctions chunks and save them in the directory
+    detect_junctions_tiled(wires_dict, directory, tiles, processes)
+
+    return wires_dict
+
+
+def detect_junctions_tiled(
+        wires_dict: Dict[str, Any],
+        directory: str,
+        tiles: int = 4,
+        processes: int = None
+):
+    """
+    Find all the pairwise intersections of the wires contained in wires_dict.
+    The device is split in tiles x tiles regions and each of them is processed
+    separately with the wires that overlap it. A junction belongs to the tile
+    that contains it, so that the found set is the same of `detect_junctions`.
+    Each worker saves the chunk of its tile, and at most two tiles per worker
+    are in flight, so that the memory is bounded by the tile size.
+    Adds two keys to the dictionary: the number of junctions and the directory
+    containing them.
+
+    Parameters
+    ----------
+    wires_dict: Dict[str, Any]
+        The wires distribution container
+    directory: str
+        The directory where to save the junctions chunks
+    tiles: int
+        Number of tiles on each side of the device
+    processes: int
+        Number of worker processes. By default, the number of available CPUs
+    """
+
+    logger.debug('Detecting junctions by tiles')
+
+    # remove the chunks of previous detections
+    os.makedirs(directory, exist_ok=True)
+    for path in glob(os.path.join(directory, __CHUNK_PATTERN)):
+        os.remove(path)
+
+    xa, ya = wires_dict['xa'], wires_dict['ya']
+    xb, yb = wires_dict['xb'], wires_dict['yb']
+    size = wires_dict['length_x'] / tiles, wires_dict['length_y'] / tiles
+
+    # get the range of tiles covered by the bounding box of each wire
+    x0 = tile(np.minimum(xa, xb), size[0], tiles)
+    x1 = tile(np.maximum(xa, xb), size[0], tiles)
+    y0 = tile(np.minimum(ya, yb), size[1], tiles)
+    y1 = tile(np.maximum(ya, yb), size[1], tiles)
+
+    processes = processes or os.cpu_count()
+
+    junctions = 0
+    with ProcessPoolExecutor(processes) as executor:
+
+        # keep a window of tiles in flight, submitting one as another ends
+        pending = set()
+        for column, row in np.ndindex(tiles, tiles):
+            index = np.flatnonzero(
+                (x0 <= column) & (column <= x1) & (y0 <= row) & (row <= y1)
+            )
+            pending.add(executor.submit(
+                tile_junctions,
+                (column, row), size, tiles, index,
+                xa[index], ya[index], xb[index], yb[index],
+                wires_dict['avg_length'],
+                os.path.join(directory, __CHUNK_FILE % (row * tiles + column))
+            ))
+            if len(pending) >= 2 * processes:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                junctions += sum(_.result() for _ in done)
+
+        junctions += sum(_.result() for _ in wait(pending).done)
+
+    if not junctions:
+        raise NoJunctionsError('There are no junctions in this network')
+
+    wires_dict['number_of_junctions'] = junctions
+    wires_dict['junctions_directory'] = directory
+
+    logger.debug('Finished detecting junctions by tiles')
+
+
+def tile(values: np.ndarray, size: float, tiles: int) -> np.ndarray:
+    """
+    Calculate the tile containing each value along an axis. The values out of
+    the device belong to the outermost tiles.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        The coordinates along the axis
+    size: float
+        The size of a tile along the axis
+    tiles: int
+        The number of tiles along the axis
+
+    Returns
+    -------
+    The index of the tile of each value.
+    """
+
+    return np.clip(values // size, 0, tiles - 1).astype(np.int64)
+
+
+def tile_junctions(
+        position: Tuple[int, int],
+        size: Tuple[float, float],
+        tiles: int,
+        index: np.ndarray,
+        xa: np.ndarray, ya: np.ndarray,
+        xb: np.ndarray, yb: np.ndarray,
+        cell_size: float,
+        path: str
+) -> int:
+    """
+    Find the junctions of the wires overlapping a tile that are inside it, and
+    save them as a chunk.
+
+    Parameters
+    ----------
+    position: Tuple[int, int]
+        Column and row of the tile
+    size: Tuple[float, float]
+        Width and height of a tile
+    tiles: int
+        Number of tiles on each side of the device
+    index: np.ndarray
+        Sorted global index of the wires overlapping the tile
+    xa, ya: np.ndarray
+        Coordinates of the first end of the wires
+    xb, yb: np.ndarray
+        Coordinates of the second end of the wires
+    cell_size: float
+        Side of the grid cells used for the detection
+    path: str
+        The file where to save the chunk
+
+    Returns
+    -------
+    The number of junctions of the tile.
+    """
+
+    first, second = candidate_pairs(xa, ya, xb, yb, cell_size)
+    x, y, found = intersections(xa, ya, xb, yb, first, second)
+
+    # keep only the junctions inside the tile
+    inside = (tile(x, size[0], tiles) == position[0])
+    inside &= (tile(y, size[1], tiles) == position[1])
+
+    first = index[first[found][inside]]
+    np.savez(
+        path, first=first, second=index[second[found][inside]],
+        xi=np.asarray(x[inside], dtype=np.float32),
+        yi=np.asarray(y[inside], dtype=np.float32)
+    )
+    return len(first)
+
+
+def junctions_chunks(directory: str) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Read the chunks of junctions saved in a directory, one at a time.
+
+    Parameters
+    ----------
+    directory: str
+        The directory containing the junctions chunks
+
+    Returns
+    -------
+    A lazy sequence of dictionaries with the first and second wire of each
+    junction (first, second) and its coordinates (xi, yi).
+    """
+
+    for path in sorted(glob(os.path.join(directory, __CHUNK_PATTERN))):
+        with np.load(path) as chunk:
+            yield dict(chunk)
+
+
+def load_junctions(wires_dict: Dict[str, Any]):
+    """
+    Merge the junctions chunks of a tiled detection into the wires dictionary.
+    Adds the junction coordinates and edge list keys, ordered as in
+    `detect_junctions`.
+
+    Parameters
+    ----------
+    wires_dict: Dict[str, Any]
+        The wires distribution container of a tiled generation
+    """
+
+    chunks = [*junctions_chunks(wires_dict['junctions_directory'])]
+    first, second, xi, yi = [
+        np.concatenate([_[key] for _ in chunks])
+        for key in ('first', 'second', 'xi', 'yi')
+    ]
+
+    # sort the junctions by first and second wire
+    order = np.lexsort((second, first))
+
+    wires_dict['xi'] = xi[order]
+    wires_dict['yi'] = yi[order]
+    wires_dict['edge_list'] = np.stack(
+        [first[order], second[order]], axis=1
+    ).astype(np.float32)
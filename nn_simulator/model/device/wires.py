@@ -17,12 +17,19 @@ And simplified/cleaned by:
 """
 import numpy as np
 
-from itertools import combinations, count as inf
+from itertools import combinations, count
 from nn_simulator.logger import logger
+from scipy.sparse import csr_matrix
 from scipy.spatial.distance import cdist
 from typing import Dict, Any, Tuple
 
 
+class NoJunctionsError(Exception):
+    """
+    Raised when the wires of a device do not intersect at all.
+    """
+
+
 def generate_wires_distribution(
         number_of_wires: int = 1500,
         wire_av_length: float = 14.0,
@@ -31,7 +38,8 @@ def generate_wires_distribution(
         general_normal_shape: int = 5,
         Lx: int = 3e3,
         Ly: int = 3e3,
-        seed: int = 42
+        seed: int = 42,
+        rng: np.random.RandomState | np.random.Generator = None
 ) -> Dict[str, Any]:
     """
     Drops nano-wires on the device of sides Lx, Ly. 
@@ -58,6 +66,10 @@ def generate_wires_distribution(
     seed: int
         Seed of the random number generator to always generate the same
         distribution
+    rng: np.random.RandomState | np.random.Generator
+        Random number generator used for the sampling. By default, a private
+        RandomState is created from the seed: the global numpy state is never
+        used, so the generation is reproducible also in concurrent threads
 
     Returns
     -------
@@ -66,17 +78,19 @@ def generate_wires_distribution(
     the wire intersects an edge of the device and is 0 otherwise.
     """
 
-    np.random.seed(seed)
+    # the legacy generator keeps the devices of the global seeding
+    if rng is None:
+        rng = np.random.RandomState(seed)
 
     # wire lengths distribution
     wire_lengths = generate_dist_lengths(
-        number_of_wires, wire_av_length, wire_dispersion
+        number_of_wires, wire_av_length, wire_dispersion, rng
     )
 
     # generate wire centroids distribution
-    xc = np.random.rand(number_of_wires) * Lx
-    yc = np.random.rand(number_of_wires) * Ly
-    theta = generate_dist_orientations(number_of_wires)
+    xc = rng.random(number_of_wires) * Lx
+    yc = rng.random(number_of_wires) * Ly
+    theta = generate_dist_orientations(number_of_wires, rng)
 
     # coordinates for one end
     xa = xc - wire_lengths / 2.0 * np.cos(theta)
@@ -86,13 +100,6 @@ def generate_wires_distribution(
     xb = xc + wire_lengths / 2.0 * np.cos(theta)
     yb = yc + wire_lengths / 2.0 * np.sin(theta)
 
-    # Compute the Euclidean distance between pair of region centres
-    wire_distances = cdist(
-        np.array([xc, yc], dtype=np.float32).T,
-        np.array([xc, yc], dtype=np.float32).T,
-        metric='euclidean'
-    )
-
     # Find values outside the domain
     a = np.where(np.vstack([xa, xb, ya, yb]) < 0.0, True, False).sum(axis=0)
     b = np.where(np.vstack([xa, xb]) > Lx, True, False).sum(axis=0)
@@ -109,18 +116,47 @@ def generate_wires_distribution(
         seed=seed,
         outside=a + b + c,
         length_x=Lx, length_y=Ly,
-        number_of_wires=number_of_wires,
-        wire_distances=wire_distances
+        number_of_wires=number_of_wires
     )
 
 
+def wire_distances(wires_dict: Dict[str, Any]) -> np.ndarray:
+    """
+    Returns the Euclidean distance between each pair of wires centroids. The
+    matrix takes quadratic memory in the number of wires: it is calculated on
+    the first request and then saved in the dictionary.
+
+    Parameters
+    ----------
+    wires_dict: Dict[str, Any]
+        The wires distribution container
+
+    Returns
+    -------
+    A numpy ndarray with the distance between the i-th and j-th wires centroid
+    in position i, j.
+    """
+
+    if 'wire_distances' not in wires_dict:
+        centroids = np.array(
+            [wires_dict['xc'], wires_dict['yc']], dtype=np.float32
+        ).T
+        wires_dict['wire_distances'] = cdist(
+            centroids, centroids, metric='euclidean'
+        )
+
+    return wires_dict['wire_distances']
+
+
 def generate_dist_lengths(
         number_of_wires: int,
         wire_av_length: float,
-        wire_dispersion: float
+        wire_dispersion: float,
+        rng: np.random.RandomState | np.random.Generator = np.random
 ) -> np.ndarray:
     """
-    Generates the distribution of wire lengths.
+    Generates the distribution of wire lengths. The lengths are drawn from a
+    normal distribution, rejecting the negative ones.
 
     Parameters
     ----------
@@ -130,28 +166,198 @@ def generate_dist_lengths(
         Average length of a wire
     wire_dispersion: float
         In the device
+    rng: np.random.RandomState | np.random.Generator
+        Random number generator used for the sampling
 
     Returns
     -------
     A numpy ndarray of the distribution.
     """
 
-    def positive_value(mu=wire_av_length, sigma=wire_dispersion):
-        return next(x for _ in inf() if (x := np.random.normal(mu, sigma)) >= 0)
-    array = [positive_value() for _ in range(number_of_wires)]
-    return np.array(array, dtype=np.float32)
+    # draw only the missing lengths at each round, so that the sequence of
+    # values is the same of drawing and rejecting them one at a time
+    lengths = np.empty(0)
+    while (missing := number_of_wires - len(lengths)) > 0:
+        values = rng.normal(wire_av_length, wire_dispersion, missing)
+        lengths = np.append(lengths, values[values >= 0])
+    return np.array(lengths, dtype=np.float32)
 
 
-def generate_dist_orientations(number_of_wires) -> np.ndarray:
+def generate_dist_orientations(
+        number_of_wires: int,
+        rng: np.random.RandomState | np.random.Generator = np.random
+) -> np.ndarray:
     # uniform random angle in [0,pi)
-    return np.random.rand(int(number_of_wires)) * np.pi
+    return rng.random(int(number_of_wires)) * np.pi
 
 
-def detect_junctions(wires_dict: Dict[str, Any]):
+def detect_junctions(wires_dict: Dict[str, Any], cell_size: float = None):
     """
     Find all the pairwise intersections of the wires contained in wires_dict.
     Adds four keys to the dictionary: junction coordinates, edge list, and
     number of junctions.
+    The wires are binned in a uniform grid and only the ones sharing a cell are
+    tested for an intersection. The result is the same of the pairwise search.
+
+    Parameters
+    ----------
+    wires_dict: Dict[str, Any]
+        The wires distribution container
+    cell_size: float
+        Side of the grid cells. By default, it is the average wire length
+    """
+
+    logger.debug('Detecting junctions')
+
+    xa, ya = wires_dict['xa'], wires_dict['ya']
+    xb, yb = wires_dict['xb'], wires_dict['yb']
+
+    # bin the wires in a grid with cells as large as an average wire
+    if cell_size is None:
+        cell_size = wires_dict['avg_length']
+    first, second = candidate_pairs(xa, ya, xb, yb, cell_size)
+
+    # calculate the intersections of the candidate couples
+    xj, yj, found = intersections(xa, ya, xb, yb, first, second)
+    edge_list = np.stack([first[found], second[found]], axis=1)
+
+    if not edge_list.size:
+        raise NoJunctionsError('There are no junctions in this network')
+
+    wires_dict['number_of_junctions'] = len(edge_list)
+    wires_dict['xi'] = np.asarray(xj, dtype=np.float32)
+    wires_dict['yi'] = np.asarray(yj, dtype=np.float32)
+    wires_dict['edge_list'] = np.asarray(edge_list, dtype=np.float32)
+
+    logger.debug('Finished detecting junctions')
+
+
+def candidate_pairs(
+        xa: np.ndarray, ya: np.ndarray,
+        xb: np.ndarray, yb: np.ndarray,
+        cell_size: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the couples of wires that may intersect, i.e., the ones whose bounding
+    boxes share at least a cell of a uniform grid.
+
+    Parameters
+    ----------
+    xa, ya: np.ndarray
+        Coordinates of the first end of the wires
+    xb, yb: np.ndarray
+        Coordinates of the second end of the wires
+    cell_size: float
+        Side of the grid cells. If it is not positive, the longest wire
+        extension is used
+
+    Returns
+    -------
+    Two arrays with the indexes of the first and second wire of each couple.
+    The first index is always the lower one and the couples are sorted.
+    """
+
+    wires_count = len(xa)
+    x_min, y_min = np.minimum(xa, xb), np.minimum(ya, yb)
+    x_max, y_max = np.maximum(xa, xb), np.maximum(ya, yb)
+
+    if not cell_size > 0:
+        cell_size = max(np.max(x_max - x_min), np.max(y_max - y_min), 1.0)
+
+    # get the range of cells covered by the bounding box of each wire
+    x0, y0 = x_min.min(initial=0), y_min.min(initial=0)
+    def cells(values: np.ndarray, origin: float) -> np.ndarray:
+        return ((values - origin) // cell_size).astype(np.int64)
+    cx0, cx1 = cells(x_min, x0), cells(x_max, x0)
+    cy0, cy1 = cells(y_min, y0), cells(y_max, y0)
+    width, height = cx1 - cx0 + 1, cy1 - cy0 + 1
+
+    # create a (wire, cell) entry for each cell covered by a wire
+    cells_count = width * height
+    wire = np.repeat(np.arange(wires_count, dtype=np.int64), cells_count)
+    offset = np.arange(cells_count.sum()) - np.repeat(
+        np.cumsum(cells_count) - cells_count, cells_count
+    )
+    cx = cx0[wire] + offset % width[wire]
+    cy = cy0[wire] + offset // width[wire]
+    cell = cy * (cx.max(initial=0) + 1) + cx
+
+    # sort the entries by cell, and by wire inside each cell
+    order = np.lexsort((wire, cell))
+    cell, wire = cell[order], wire[order]
+
+    # couple each entry with the following ones of the same cell
+    keys = [np.empty(0, dtype=np.int64)]
+    for shift in count(1):
+        same = cell[shift:] == cell[:-shift]
+        if not same.any():
+            break
+        keys.append(wire[:-shift][same] * wires_count + wire[shift:][same])
+
+    # remove the couples found in more than one cell
+    keys = np.unique(np.concatenate(keys))
+    return keys // wires_count, keys % wires_count
+
+
+def intersections(
+        xa: np.ndarray, ya: np.ndarray,
+        xb: np.ndarray, yb: np.ndarray,
+        first: np.ndarray, second: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the junction position of the given couples of segments.
+
+    Parameters
+    ----------
+    xa, ya: np.ndarray
+        Coordinates of the first end of the wires
+    xb, yb: np.ndarray
+        Coordinates of the second end of the wires
+    first: np.ndarray
+        Indexes of the first segment of each couple
+    second: np.ndarray
+        Indexes of the second segment of each couple
+
+    Returns
+    -------
+    The x and y position of the junctions and the mask of the couples that
+    actually intersect.
+    """
+
+    # calculate distance between start and end point
+    delta_x, delta_y = xa - xb, ya - yb
+    m = xa * yb - ya * xb
+
+    c = delta_x[first] * delta_y[second] - delta_y[first] * delta_x[second]
+
+    # exclude the (almost) parallel segments
+    found = np.abs(c) >= 0.01
+    first, second, c = first[found], second[found], c[found]
+
+    a, b = m[first], m[second]
+    x = (a * delta_x[second] - b * delta_x[first]) / c
+    y = (a * delta_y[second] - b * delta_y[first]) / c
+
+    def between(value: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        return (np.minimum(u, v) <= value) & (value <= np.maximum(u, v))
+
+    # exclude junction points out of the points area
+    inside = between(x, xa[first], xb[first])
+    inside &= between(x, xa[second], xb[second])
+    inside &= between(y, ya[first], yb[first])
+    inside &= between(y, ya[second], yb[second])
+    found[found] = inside
+
+    return x[inside], y[inside], found
+
+
+def detect_junctions_pairwise(wires_dict: Dict[str, Any]):
+    """
+    Find all the pairwise intersections of the wires contained in wires_dict
+    testing each couple of wires. Adds four keys to the dictionary: junction
+    coordinates, edge list, and number of junctions.
+    Quadratic in the number of wires: it is kept as a reference for the
+    grid-based detection.
 
     Parameters
     ----------
@@ -231,11 +437,11 @@ def detect_junctions(wires_dict: Dict[str, Any]):
     junctions = dict(filter(lambda _: _[1], junctions))
 
     xj = np.array([*map(lambda _: _[0], junctions.values())], dtype=np.float32)
-    yj = np.array([*map(lambda _: _[0], junctions.values())], dtype=np.float32)
+    yj = np.array([*map(lambda _: _[1], junctions.values())], dtype=np.float32)
     edge_list = np.array([*junctions.keys()], dtype=np.float32)
 
     if not edge_list.size:
-        raise Exception('There are no junctions in this network')
+        raise NoJunctionsError('There are no junctions in this network')
 
     wires_dict['number_of_junctions'] = len(edge_list)
     wires_dict['xi'] = xj
@@ -245,7 +451,7 @@ def detect_junctions(wires_dict: Dict[str, Any]):
     logger.debug('Finished detecting junctions')
 
 
-def generate_adj_matrix(wires_dict):
+def generate_adj_matrix(wires_dict: Dict[str, Any], sparse: bool = False):
     """
     This function will produce adjacency matrix of the physical network.
 
@@ -254,12 +460,23 @@ def generate_adj_matrix(wires_dict):
     wires_dict: dict
         a dictionary with all the wires position and junctions/intersection 
         positions.
+    sparse: bool
+        if True, the adjacency matrix is a scipy CSR sparse matrix instead of a
+        dense numpy one
     """
 
-    # create array -- maybe use sparse matrix?
     wires_count, edges = wires_dict['number_of_wires'], wires_dict['edge_list']
-    adj_matrix = np.zeros((wires_count, wires_count), dtype=np.float32)
-    adj_matrix[edges.astype(np.int32)[:, 0], edges.astype(np.int32)[:, 1]] = 1.0
+    rows, columns = edges.astype(np.int32)[:, 0], edges.astype(np.int32)[:, 1]
+
+    if sparse:
+        adj_matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(wires_count, wires_count)
+        )
+    else:
+        adj_matrix = np.zeros((wires_count, wires_count), dtype=np.float32)
+        adj_matrix[rows, columns] = 1.0
 
     # make the matrix symmetric
-    wires_dict['adj_matrix'] = adj_matrix + adj_matrix.T
+    adj_matrix = adj_matrix + adj_matrix.T
+    wires_dict['adj_matrix'] = adj_matrix.tocsr() if sparse else adj_matrix
@@ -1,12 +1,16 @@
-import cupy as cp
+import numpy as np
 
-from nn_simulator.model.device.network import Network
-from nn_simulator.model.utils import stack
+from nn_simulator import backend as cp
+from nn_simulator.model.device.network import Network, topologies
+from nn_simulator.model.utils import assign, clear, expand, insert, positions
+from nn_simulator.model.utils import sparse_rows
+from typing import Iterable, List
 
 
-def connect(network: Network, wire_idx: int, resistance: float):
+def connect(network: Network, wire_idx: int, resistance: float) -> int:
     """
-    Connect an external load to the network.
+    Connect an external load to the network. The load takes a free ground
+    slot, if any, otherwise a new ground is added to the network.
 
     Parameters
     ----------
@@ -16,25 +20,17 @@ def connect(network: Network, wire_idx: int, resistance: float):
         index of the connection node of the nanowire network
     resistance: float
         resistance of the attached load
+    Returns
+    -------
+    The index of the ground node of the load.
     """
-
-    # set the row connection
-    ground_pad = cp.zeros(len(network.adjacency))
-    ground_pad[wire_idx] = 1 / resistance
-
-    # pad the matrix with the column on right and bottom
-    network.adjacency = stack(network.adjacency, ground_pad)
-    network.circuit = stack(network.circuit, ground_pad)
-    network.admittance = stack(network.admittance, ground_pad)
-    network.voltage = cp.pad(network.voltage, (0, 1))
-
-    # increment number of grounds
-    network.external_grounds += 1
+    return attach(network, [wire_idx], [resistance])[0]
 
 
 def disconnect(network: Network):
     """
-    Disconnect all the external loads of the network.
+    Disconnect all the external loads of the network. The reserved ground
+    slots are kept, while the other external grounds are removed.
 
     Parameters
     ----------
@@ -46,6 +42,13 @@ def disconnect(network: Network):
     if not (grounds := network.external_grounds):
         return
 
+    # free the reserved slots and remove the other grounds
+    if reserved := network.reserved_grounds:
+        first = network.nodes - grounds
+        detach(network, range(first, first + reserved))
+    if not (grounds := grounds - reserved):
+        return
+
     # remove paddings from the matrix
     network.adjacency = network.adjacency[:-grounds, :-grounds]
     network.circuit = network.circuit[:-grounds, :-grounds]
@@ -53,4 +56,157 @@ def disconnect(network: Network):
     network.voltage = network.voltage[:-grounds]
 
     # decrement number of grounds
-    network.external_grounds = 0
+    network.external_grounds = reserved
+    network.topology = next(topologies)
+
+
+def reserve(network: Network, grounds: int):
+    """
+    Add free ground slots to the network, so that loads can be connected and
+    disconnected without reallocating its matrices. All the external grounds
+    of the network become reserved, i.e., they are kept on disconnection.
+    Sparse matrices cannot leave room for new entries: they store an explicit
+    zero between each wire and each reserved slot, i.e., two entries per wire
+    and slot, where the loads are then written in place.
+
+    Parameters
+    ----------
+    network: Network
+        the nanowire network in which reserve the slots
+    grounds: int
+        the number of slots to add
+    """
+
+    network.adjacency = expand(network.adjacency, grounds)
+    network.circuit = expand(network.circuit, grounds)
+    network.admittance = expand(network.admittance, grounds)
+    xp = cp.get_array_module(network.voltage)
+    network.voltage = xp.pad(network.voltage, (0, grounds))
+
+    network.external_grounds += grounds
+    network.reserved_grounds = network.external_grounds
+    network.topology = next(topologies)
+    if not network.sparse:
+        return
+
+    # store an explicit zero for each possible load of the external grounds
+    first = network.nodes - network.external_grounds
+    wires = np.tile(np.arange(first), network.external_grounds)
+    slots = np.repeat(np.arange(first, network.nodes), first)
+    rows = np.concatenate((wires, slots))
+    columns = np.concatenate((slots, wires))
+    missing = positions(network.adjacency, rows, columns) < 0
+    rows, columns = rows[missing], columns[missing]
+    zeros = np.zeros(len(rows), dtype=np.float32)
+    network.adjacency = insert(network.adjacency, rows, columns, zeros)
+    network.circuit = insert(network.circuit, rows, columns, zeros)
+    network.admittance = insert(network.admittance, rows, columns, zeros)
+
+def free_grounds(network: Network) -> np.ndarray:
+    """
+    Returns the external grounds without a connected load.
+
+    Parameters
+    ----------
+    network: Network
+        the nanowire network of which find the free slots
+    Returns
+    -------
+    The sorted indices of the free ground nodes.
+    """
+
+    first = network.nodes - network.external_grounds
+    if network.sparse:
+        adjacency = network.adjacency
+        connected = np.bincount(
+            sparse_rows(adjacency), adjacency.data != 0,
+            minlength=network.nodes
+        )[first:] > 0
+    else:
+        connected = cp.asnumpy(network.adjacency[first:].any(axis=1))
+    return first + np.flatnonzero(~connected)
+
+
+def attach(
+        network: Network,
+        wires: Iterable[int],
+        resistances: Iterable[float]
+) -> List[int]:
+    """
+    Connect several external loads to the network at once. The loads take
+    the free ground slots in order; if they are not enough, the missing
+    grounds are added to the network with a single reallocation. Dense
+    matrices are written in place. Sparse matrices are written in place on
+    the entries in their structure, i.e., on the reserved slots (see
+    `reserve`), and are rebuilt once if any other entry is needed.
+
+    Parameters
+    ----------
+    network: Network
+        the nanowire network to connect the loads to
+    wires: Iterable[int]
+        index of the connection node of each load
+    resistances: Iterable[float]
+        resistance of each load
+    Returns
+    -------
+    The index of the ground node of each load.
+    """
+
+    wires = np.asarray(list(wires), dtype=int)
+    values = 1 / np.asarray(list(resistances), dtype=np.float32)
+
+    # add the grounds missing from the free slots
+    grounds = free_grounds(network)[:len(wires)]
+    if missing := len(wires) - len(grounds):
+        network.adjacency = expand(network.adjacency, missing)
+        network.circuit = expand(network.circuit, missing)
+        network.admittance = expand(network.admittance, missing)
+        xp = cp.get_array_module(network.voltage)
+        network.voltage = xp.pad(network.voltage, (0, missing))
+
+        added = network.nodes - missing + np.arange(missing)
+        grounds = np.append(grounds, added)
+        network.external_grounds += missing
+
+    # connect each load between its wire and its ground
+    rows = np.concatenate((wires, grounds))
+    columns = np.concatenate((grounds, wires))
+    values = np.tile(values, 2)
+    if network.sparse:
+        network.adjacency = assign(network.adjacency, rows, columns, values)
+        network.circuit = assign(network.circuit, rows, columns, values)
+        network.admittance = assign(network.admittance, rows, columns, values)
+    else:
+        xp = cp.get_array_module(network.adjacency)
+        for matrix in (network.adjacency, network.circuit, network.admittance):
+            matrix[rows, columns] = xp.asarray(values)
+
+    network.topology = next(topologies)
+    return grounds.tolist()
+
+
+def detach(network: Network, grounds: Iterable[int]):
+    """
+    Disconnect the loads of some external grounds, keeping the grounds as
+    free slots for new loads. The matrices are cleared in place: the sparse
+    ones keep the entries of the loads as explicit zeros.
+
+    Parameters
+    ----------
+    network: Network
+        the nanowire network from which disconnect the loads
+    grounds: Iterable[int]
+        the indices of the ground nodes of the loads
+    """
+
+    grounds = np.asarray(list(grounds), dtype=int)
+    if network.sparse:
+        for matrix in (network.adjacency, network.circuit, network.admittance):
+            clear(matrix, grounds)
+    else:
+        for matrix in (network.adjacency, network.circuit, network.admittance):
+            matrix[grounds] = 0
+            matrix[:, grounds] = 0
+
+    network.topology = next(topologies)
@@ -1,6 +1,6 @@
-import cupy as cp
 import random
 
+from nn_simulator import backend as cp
 from nn_simulator.model.device.network import Network
 from typing import Callable, List, Set
 
@@ -52,7 +52,8 @@ def minimum_distance_selection(
     def _(network: Network, _: List[int]) -> Set[int]:
 
         # create a mask of viable nodes (false = viable; initially all)
-        viable = cp.zeros(network.nodes - network.external_grounds, dtype=bool)
+        xp = cp.get_array_module(network.voltage)
+        viable = xp.zeros(network.nodes - network.external_grounds, dtype=bool)
 
         # set unavailable (i.e., true) the specified nodes
         viable[outputs] = True
@@ -65,7 +66,11 @@ def minimum_distance_selection(
                 return mask
 
             # set the nodes neighbor as unavailable
-            mask |= cp.sum(network.adjacency[mask], axis=0, dtype=bool)
+            if network.sparse:
+                reached = network.adjacency[:len(mask)][mask].getnnz(axis=0)
+                mask |= reached[:len(mask)] > 0
+            else:
+                mask |= cp.sum(network.adjacency[mask], axis=0, dtype=bool)
 
             # recur until found all neighbours
             return neighbours(mask, decreased_distance - 1)
@@ -75,7 +80,7 @@ def minimum_distance_selection(
 
         # negate the boolean values if required
         if not negate:
-            viable = cp.logical_not(viable)
+            viable = xp.logical_not(viable)
 
         # remove device grounds from list of available nodes
         if network.device_grounds > 0:
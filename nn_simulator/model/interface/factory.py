@@ -25,11 +25,11 @@ def random_nodes(network: Network, avoid: Set[int], count: int = 1) -> Set[int]:
     A random set of nodes from the network, excluding the specified ones.
     """
 
-    viable_nodes = len(network.circuit) - len(avoid)
+    viable_nodes = network.nodes - len(avoid)
     assert viable_nodes > count, __NO_VIABLE_NODE_ERROR
 
     # get a 'count' random available nodes
-    return set(random.sample(set(range(len(network.circuit))) - avoid, k=count))
+    return set(random.sample(set(range(network.nodes)) - avoid, k=count))
 
 
 def random_loads(
@@ -0,0 +1,247 @@
+import numpy as np
+import scipy.sparse as sp
+
+from dataclasses import dataclass
+from nn_simulator import backend as cp
+from nn_simulator.model.device import Datasheet
+from nn_simulator.model.device.network import Network
+from nn_simulator.model.stimulator import Solver, stimulate
+from nn_simulator.model.utils import sparse_rows
+from typing import Dict, List, Tuple
+
+
+@dataclass
+class Pack:
+    """
+    Contains several networks packed in a single sparse network, whose
+    matrices are block-diagonal. The packed network has the wires of all the
+    networks first, then their device grounds and finally their external
+    grounds, so that it is a valid network for the stimulation.
+
+    Fields
+    ------
+    network: Network
+        the sparse network packing all the networks
+    networks: List[Network]
+        the packed networks
+    nodes: List[np.ndarray]
+        index in the packed network of each node of each network
+    entries: List[np.ndarray]
+        index in the packed matrices data of each entry of each network
+    """
+
+    network: Network
+    networks: List[Network]
+    nodes: List[np.ndarray]
+    entries: List[np.ndarray]
+
+
+def pack(networks: List[Network]) -> Pack:
+    """
+    Pack several networks, either dense or sparse, in a single block-diagonal
+    sparse network. The networks structure (e.g., loads connections) must not
+    change while the pack is in use.
+
+    Parameters
+    ----------
+    networks: List[Network]
+        The networks to pack
+    Returns
+    -------
+    The pack of the networks.
+    """
+
+    # count the nodes of each kind, to move the grounds to the end
+    counts = np.array([
+        (_.wires, _.device_grounds, _.external_grounds) for _ in networks
+    ])
+    starts = np.cumsum(counts, axis=0) - counts
+    starts += np.append(0, np.cumsum(counts.sum(axis=0))[:-1])
+
+    nodes = [
+        np.concatenate([start + np.arange(count) for start, count in zip(*_)])
+        for _ in zip(starts, counts)
+    ]
+
+    # collect the entries of the networks in the packed indices
+    matrices = list(map(entries, networks))
+    rows, columns = [
+        np.concatenate([i[m[k]] for i, m in zip(nodes, matrices)])
+        for k in (0, 1)
+    ]
+    values = [np.concatenate([_[k] for _ in matrices]) for k in range(2, 5)]
+
+    # sort the entries by row and column to build the shared CSR structure
+    order = np.lexsort((columns, rows))
+    size = sum(map(len, nodes))
+    indptr = np.append(0, np.cumsum(np.bincount(rows, minlength=size)))
+    adjacency, circuit, admittance = [
+        sp.csr_matrix((_[order], columns[order], indptr), shape=(size, size))
+        for _ in values
+    ]
+
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    bounds = np.cumsum([0] + [len(_[0]) for _ in matrices])
+
+    voltage = np.zeros(size)
+    for index, network in zip(nodes, networks):
+        voltage[index] = cp.asnumpy(network.voltage)
+
+    network = Network(
+        adjacency=adjacency,
+        wires_position=positions(networks, nodes, 'wires'),
+        junctions_position=positions(networks, nodes, 'junctions'),
+        circuit=circuit,
+        admittance=admittance,
+        voltage=voltage,
+        device_grounds=int(counts[:, 1].sum()),
+        external_grounds=int(counts[:, 2].sum())
+    )
+    return Pack(
+        network, networks, nodes,
+        [position[a:b] for a, b in zip(bounds, bounds[1:])]
+    )
+
+
+def unpack(packed: Pack) -> List[Network]:
+    """
+    Update the state of the packed networks with the one of the pack.
+
+    Parameters
+    ----------
+    packed: Pack
+        The pack to unpack
+    Returns
+    -------
+    The packed networks, with the updated state.
+    """
+
+    circuit, admittance = packed.network.circuit, packed.network.admittance
+    for network, index, slots in zip(
+            packed.networks, packed.nodes, packed.entries
+    ):
+        xp = cp.get_array_module(network.voltage)
+        network.voltage = xp.asarray(packed.network.voltage[index])
+
+        if network.sparse:
+            network.circuit.data[:] = circuit.data[slots]
+            network.admittance.data[:] = admittance.data[slots]
+            continue
+
+        rows, columns = xp.nonzero(network.adjacency)
+        network.circuit[rows, columns] = xp.asarray(circuit.data[slots])
+        network.admittance[rows, columns] = xp.asarray(admittance.data[slots])
+
+    return packed.networks
+
+
+def stimulate_pack(
+        packed: Pack,
+        datasheet: Datasheet,
+        delta_time: float,
+        inputs: List[Dict[int, float]],
+        solver: Solver = None
+):
+    """
+    Stimulate all the packed networks at once, through voltage-inputs on
+    given pins of each of them. The function modify the pack, whose state can
+    be copied to the packed networks with `unpack`.
+
+    Parameters
+    ----------
+    packed: Pack
+        The pack of networks to stimulate
+    datasheet: Datasheet
+        The datasheet of the characteristics of the devices
+    delta_time: float
+        The time elapsed from the last update
+    inputs: List[Dict[int, float]]
+        For each network, the pair of source/nodes with, for each, the
+        correspondent voltage value
+    solver: Solver
+        The function solving the circuit (see `modified_voltage_node_analysis`)
+    """
+
+    inputs = {
+        int(index[source]): value
+        for index, signals in zip(packed.nodes, inputs)
+        for source, value in signals.items()
+    }
+    stimulate(packed.network, datasheet, delta_time, inputs, solver)
+
+
+def entries(network: Network) -> Tuple[np.ndarray, ...]:
+    """
+    Returns the entries of the network matrices, in row-major order.
+
+    Parameters
+    ----------
+    network: Network
+        The network from which take the entries
+    Returns
+    -------
+    A tuple with the rows and the columns of the entries, and the values of the
+    adjacency, circuit and admittance on them.
+    """
+
+    if network.sparse:
+        return (
+            sparse_rows(network.adjacency), network.adjacency.indices,
+            network.adjacency.data, network.circuit.data,
+            network.admittance.data
+        )
+
+    rows, columns = cp.nonzero(network.adjacency)
+    return tuple(map(cp.asnumpy, (
+        rows, columns, network.adjacency[rows, columns],
+        network.circuit[rows, columns], network.admittance[rows, columns]
+    )))
+
+
+def positions(
+        networks: List[Network],
+        nodes: List[np.ndarray],
+        kind: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the positions of the wires or of the junctions of the packed
+    networks, in the order of the packed network.
+
+    Parameters
+    ----------
+    networks: List[Network]
+        The packed networks
+    nodes: List[np.ndarray]
+        Index in the packed network of each node of each network
+    kind: str
+        Either 'wires' or 'junctions'
+    Returns
+    -------
+    The x and y positions vectors.
+    """
+
+    x, y = [
+        np.concatenate([
+            cp.asnumpy(getattr(_, kind + '_position')[axis]) for _ in networks
+        ]) for axis in (0, 1)
+    ]
+
+    # the wires are placed at their packed index. the nodes indexing keeps the
+    # order of the nodes of a network, so the junctions are sorted again only
+    # by their packed nodes
+    if kind == 'wires':
+        order = np.argsort(np.concatenate([
+            index[:len(_.wires_position[0])]
+            for index, _ in zip(nodes, networks)
+        ]))
+    else:
+        first, second = [
+            np.concatenate([
+                index[cp.asnumpy(_.junctions[node])]
+                for index, _ in zip(nodes, networks)
+            ]) for node in (0, 1)
+        ]
+        order = np.lexsort((second, first))
+
+    return x[order], y[order]
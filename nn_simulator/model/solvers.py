@@ -0,0 +1,782 @@
+from __future__ import annotations
+
+import numpy as np
+import scipy.sparse as sp
+
+from dataclasses import dataclass, field
+from nn_simulator import backend as cp
+from nn_simulator.logger import logger
+from nn_simulator.model.device.network import Network
+from nn_simulator.model.utils import sparse_rows
+from scipy.sparse.linalg import splu
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def dense_mna(network: Network, inputs: Dict[int, float]) -> cp.ndarray:
+    """
+    Execute the Modified Nodal Analysis for voltages calculation, assembling
+    the system as a dense matrix and solving it with a dense solver.
+
+    Parameters
+    ----------
+    network: Network
+        The nanowire network circuit
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    Returns
+    -------
+    The currents flowing through the sources, in the sorted sources order.
+    """
+
+    # create a vector to contain the voltages of the input nodes
+    # the ground nodes are not present
+    sources = sorted(inputs)
+    voltages = cp.asarray([inputs[_] for _ in sources], dtype=cp.float32)
+    Z = cp.append(cp.zeros(network.wires), voltages)
+
+    # create a vector to identify the sources (1: source, 0: non-source)
+    # each column contains only one '1': there is 1 column for each source
+    B = cp.zeros((network.wires, len(sources)))
+    B[sources, cp.arange(len(sources))] = 1
+
+    # stores the sum of the conductances of the edges incident on a node
+    # each row refer to a specific node and the index r,c represent the
+    # conductance in the arch from node r to c
+    G = cp.negative(network.circuit.astype(cp.float64))
+    summa = cp.negative(cp.sum(G, axis=1))
+    cp.fill_diagonal(G, summa)
+
+    # add sources identifiers as the last column of the matrix
+    Y = cp.hstack((G[:network.wires, :network.wires], B))
+
+    # add a slot in the sources array
+    B = cp.vstack((B, cp.zeros((len(sources), len(sources)))))
+    B = cp.transpose(B)
+
+    # construct Y matrix as a combination of G, B, D in the form [(G B); (B' D)]
+    # add the sources also to the bottom of the matrix
+    Y = cp.vstack((Y, B))
+
+    # perform analysis of the circuit (Yx = z -> x = Y^(-1)z)
+    x = cp.linalg.solve(Y, Z)
+    network.voltage = cp.pad(x[:network.wires], (0, network.grounds))
+    return x[network.wires:]
+
+
+def sparse_mna(network: Network, inputs: Dict[int, float]) -> np.ndarray:
+    """
+    Execute the Modified Nodal Analysis for voltages calculation, assembling
+    the system as a sparse matrix from the non-zero conductances and solving
+    it with a sparse LU factorization. Dense networks are solved on the host
+    and their voltages are moved back to their original memory.
+
+    Parameters
+    ----------
+    network: Network
+        The nanowire network circuit, either dense or sparse
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    Returns
+    -------
+    The currents flowing through the sources, in the sorted sources order.
+    """
+
+    xp = cp.get_array_module(network.voltage)
+    circuit = network.circuit
+    if not network.sparse:
+        circuit = sp.csr_matrix(cp.asnumpy(circuit))
+
+    Y, Z = mna_system(circuit, network.wires, inputs)
+
+    # perform analysis of the circuit (Yx = z -> x = Y^(-1)z)
+    x = splu(Y).solve(Z)
+    voltage = np.pad(x[:network.wires], (0, network.grounds))
+    network.voltage = xp.asarray(voltage)
+    return x[network.wires:]
+
+
+def mna_system(
+        circuit: sp.csr_matrix,
+        wires: int,
+        inputs: Dict[int, float]
+) -> Tuple[sp.csc_matrix, np.ndarray]:
+    """
+    Assemble the sparse Modified Nodal Analysis system of a circuit, in the
+    form [(G B); (B' 0)] x = z, with the sources in sorted order.
+
+    Parameters
+    ----------
+    circuit: sp.csr_matrix
+        The conductance matrix of the circuit, including the grounds as the
+        last nodes
+    wires: int
+        The number of non-ground nodes of the circuit
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    Returns
+    -------
+    A tuple with the system matrix, in CSC format, and the known-terms vector.
+    """
+
+    sources = sorted(inputs)
+    circuit = circuit.astype(np.float64)
+
+    # conductance matrix of the non-ground nodes: the diagonal stores the sum
+    # of the conductances of the edges incident on a node
+    G = sp.diags(np.asarray(circuit.sum(axis=1)).ravel()) - circuit
+    G = G.tocsr()[:wires, :wires]
+
+    # sources identifiers: there is 1 column for each source
+    B = sp.csr_matrix(
+        (np.ones(len(sources)), (sources, range(len(sources)))),
+        shape=(wires, len(sources))
+    )
+
+    Y = sp.bmat([[G, B], [B.T, None]], format='csc')
+    Z = np.append(np.zeros(wires), [inputs[_] for _ in sources])
+    return Y, Z
+
+
+def reduced_spd(network: Network, inputs: Dict[int, float]) -> np.ndarray:
+    """
+    Calculate the voltages eliminating the sources and the grounds, whose
+    voltages are known, from the nodal system. The remaining conductance
+    system (i.e., the reduced Laplacian) is symmetric positive-definite and it
+    is solved with a symmetric factorization. Dense networks are solved on the
+    host and their voltages are moved back to their original memory.
+
+    Parameters
+    ----------
+    network: Network
+        The nanowire network circuit, either dense or sparse
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    Returns
+    -------
+    The currents flowing through the sources, in the sorted sources order, as
+    the Modified Nodal Analysis reports them.
+    """
+
+    xp = cp.get_array_module(network.voltage)
+    circuit = network.circuit
+    if not network.sparse:
+        circuit = sp.csr_matrix(cp.asnumpy(circuit))
+
+    L, A, b, free = reduced_system(circuit, network.wires, inputs)
+
+    # the grounds stay at 0V and the sources at their voltage
+    sources = sorted(inputs)
+    x = np.zeros(network.nodes)
+    x[sources] = [inputs[_] for _ in sources]
+    x[free] = symmetric_factorization(A).solve(b)
+
+    network.voltage = xp.asarray(x)
+    return -(L[sources] @ x)
+
+
+def reduced_system(
+        circuit: sp.csr_matrix,
+        wires: int,
+        inputs: Dict[int, float]
+) -> Tuple[sp.csr_matrix, sp.csr_matrix, np.ndarray, np.ndarray]:
+    """
+    Assemble the nodal system of a circuit reduced to the nodes of unknown
+    voltage, i.e., excluding the sources and the grounds. The voltages of the
+    excluded nodes are moved to the known terms as Dirichlet conditions.
+
+    Parameters
+    ----------
+    circuit: sp.csr_matrix
+        The conductance matrix of the circuit, including the grounds as the
+        last nodes
+    wires: int
+        The number of non-ground nodes of the circuit
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    Returns
+    -------
+    A tuple with the Laplacian of the whole circuit, the reduced Laplacian,
+    the known-terms vector and the indices of the nodes of unknown voltage.
+    """
+
+    sources = sorted(inputs)
+    voltages = np.asarray([inputs[_] for _ in sources], dtype=np.float64)
+    circuit = circuit.astype(np.float64)
+
+    # the diagonal stores the sum of the conductances incident on a node
+    L = sp.diags(np.asarray(circuit.sum(axis=1)).ravel()) - circuit
+    L = L.tocsr()
+
+    free = np.ones(wires, dtype=bool)
+    free[sources] = False
+    free = np.flatnonzero(free)
+
+    rows = L[free]
+    return L, rows[:, free], -(rows[:, sources] @ voltages), free
+
+
+def symmetric_factorization(matrix: sp.spmatrix) -> Any:
+    """
+    Factorize a sparse symmetric positive-definite matrix. SciPy does not
+    provide a sparse Cholesky factorization, so SuperLU is used with a
+    symmetric fill-reducing ordering and diagonal pivots, which performs the
+    same symmetric elimination.
+
+    Parameters
+    ----------
+    matrix: sp.spmatrix
+        The symmetric positive-definite matrix to factorize
+    Returns
+    -------
+    The factorization object, exposing a `solve` method.
+    """
+    return splu(
+        matrix.tocsc(), permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0,
+        options=dict(SymmetricMode=True)
+    )
+
+
+@dataclass
+class ConjugateGradient:
+    """
+    Iterative solver of the reduced nodal system (see `reduced_spd`) through
+    the Jacobi-preconditioned conjugate gradient method. Each solution starts
+    from the current voltages of the network, that between consecutive time
+    steps are close to the new ones.
+
+    Fields
+    ------
+    tolerance: float
+        relative residual norm at which the iterations stop
+    max_iterations: int | None
+        maximum number of iterations of a solution; if None, it is the number
+        of unknowns
+    iterations: List[int]
+        number of iterations of each solution performed by the solver
+    """
+
+    tolerance: float = 1e-6
+    max_iterations: int | None = None
+    iterations: List[int] = field(default_factory=list)
+
+    def __call__(self, network: Network, inputs: Dict[int, float]):
+        """
+        Calculate the voltages of the network given the inputs.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        inputs: Dict[int, float]
+            A pair of node input index and applied voltage
+        Returns
+        -------
+        The currents flowing through the sources, in the sorted sources order,
+        as the Modified Nodal Analysis reports them.
+        """
+
+        xp = cp.get_array_module(network.voltage)
+        circuit = network.circuit
+        if not network.sparse:
+            circuit = sp.csr_matrix(cp.asnumpy(circuit))
+
+        L, A, b, free = reduced_system(circuit, network.wires, inputs)
+
+        # warm start from the last voltages, if the nodes are unchanged
+        sources = sorted(inputs)
+        x = np.zeros(network.nodes)
+        if len(network.voltage) == network.nodes:
+            x[free] = cp.asnumpy(network.voltage)[free]
+        x[sources] = [inputs[_] for _ in sources]
+        x[free], iterations = self.solve(A, b, x[free])
+
+        self.iterations.append(iterations)
+        network.voltage = xp.asarray(x)
+        return -(L[sources] @ x)
+
+    def solve(
+            self,
+            A: sp.csr_matrix,
+            b: np.ndarray,
+            x: np.ndarray
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Solve the symmetric positive-definite system Ax = b.
+
+        Parameters
+        ----------
+        A: sp.csr_matrix
+            The matrix of the system
+        b: np.ndarray
+            The known-terms vector
+        x: np.ndarray
+            The initial guess of the solution
+        Returns
+        -------
+        A tuple with the solution and the number of performed iterations.
+        """
+
+        inverse = 1 / A.diagonal()
+        threshold = self.tolerance * np.linalg.norm(b)
+        limit = self.max_iterations or len(b)
+
+        r = b - A @ x
+        z = inverse * r
+        p, rz = z.copy(), r @ z
+        for iteration in range(limit + 1):
+            if np.linalg.norm(r) <= threshold:
+                return x, iteration
+            if iteration == limit:
+                break
+
+            Ap = A @ p
+            alpha = rz / (p @ Ap)
+            x += alpha * p
+            r -= alpha * Ap
+
+            z = inverse * r
+            rz, previous = r @ z, rz
+            p = z + rz / previous * p
+
+        logger.warning('Conjugate gradient did not converge in %d iterations',
+                       limit)
+        return x, limit
+
+
+@dataclass
+class SolverContext:
+    """
+    Direct solver of the reduced nodal system (see `reduced_spd`) that keeps,
+    across time steps, all that only depends on the network topology, sources
+    and grounds: the assembly pattern of the reduced system and its
+    fill-reducing ordering. Each solution then only scatters the conductances
+    in the pattern and factorizes numerically. The context is analysed again
+    when its key changes, i.e., when the loads are connected or disconnected,
+    or the grounds or the sources set change.
+    With the 'mixed' precision, the system is factorized and solved in single
+    precision, and the solution is then corrected with a few steps of
+    iterative refinement on the double precision residual.
+    With a positive rank, a system whose rows changed on at most rank nodes
+    since the last factorization (e.g., a moved load or a few switching
+    junctions) is solved through a low-rank update of it, without analysing
+    or factorizing again. A moved load keeps the ordering of the system, and
+    only its assembly pattern is rebuilt. The changes below the threshold,
+    relative to the diagonal of their row, are left to the refinement of the
+    solution and do not count in the rank.
+
+    Fields
+    ------
+    analyses: int
+        number of structural analyses performed by the context
+    precision: str
+        either 'double' or 'mixed', the precision of the factorization
+    refinements: int
+        maximum number of iterative refinement steps of a mixed precision
+        solution
+    residuals: List[float]
+        relative residual norm of each solution performed by the solver
+    rank: int
+        maximum number of changed nodes solved with a low-rank update of the
+        last factorization; 0 disables the updates
+    updates: int
+        number of solutions performed with a low-rank update
+    threshold: float
+        relative change of an entry of the system below which it is not
+        counted as changed by the low-rank updates
+    """
+
+    analyses: int = 0
+    precision: str = 'double'
+    refinements: int = 3
+    residuals: List[float] = field(default_factory=list)
+    rank: int = 0
+    updates: int = 0
+    threshold: float = 1e-6
+
+    key: Tuple | None = field(default=None, init=False, repr=False)
+
+    # circuit entries and their role in the assembly
+    rows: np.ndarray = field(default=None, init=False, repr=False)
+    columns: np.ndarray = field(default=None, init=False, repr=False)
+    gather: Tuple = field(default=None, init=False, repr=False)
+    free: np.ndarray = field(default=None, init=False, repr=False)
+    sources: np.ndarray = field(default=None, init=False, repr=False)
+    matrix: np.ndarray = field(default=None, init=False, repr=False)
+    signs: np.ndarray = field(default=None, init=False, repr=False)
+    known: np.ndarray = field(default=None, init=False, repr=False)
+    currents: np.ndarray = field(default=None, init=False, repr=False)
+
+    # reduced system pattern, in the fill-reducing order
+    order: np.ndarray = field(default=None, init=False, repr=False)
+    slots: np.ndarray = field(default=None, init=False, repr=False)
+    indices: np.ndarray = field(default=None, init=False, repr=False)
+    indptr: np.ndarray = field(default=None, init=False, repr=False)
+
+    # last numeric factorization and its matrix, in the same order
+    wires: int = field(default=None, init=False, repr=False)
+    factorized: sp.csc_matrix = field(default=None, init=False, repr=False)
+    factorization: Any = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.precision not in ('double', 'mixed'):
+            raise ValueError(f'Unknown precision: {self.precision}')
+
+    def __call__(self, network: Network, inputs: Dict[int, float]):
+        """
+        Calculate the voltages of the network given the inputs.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        inputs: Dict[int, float]
+            A pair of node input index and applied voltage
+        Returns
+        -------
+        The currents flowing through the sources, in the sorted sources order,
+        as the Modified Nodal Analysis reports them.
+        """
+
+        key = (
+            network.topology, network.sparse, network.nodes, network.grounds,
+            tuple(sorted(inputs))
+        )
+        if key != self.key:
+            if (currents := self.moved(network, inputs)) is not None:
+                self.key = key
+                return currents
+            self.analyse(network, list(key[-1]))
+            self.key = key
+
+        # gather the conductances of the circuit entries
+        if network.sparse:
+            conductances = network.circuit.data.astype(np.float64)
+        else:
+            conductances = network.circuit[self.gather]
+            conductances = cp.asnumpy(conductances).astype(np.float64)
+        rows, columns = self.rows, self.columns
+
+        # voltages of the nodes: the grounds stay at 0V
+        x = np.zeros(network.nodes)
+        x[self.sources] = [inputs[_] for _ in self.sources]
+
+        # scatter the conductances in the reduced system and solve it
+        weights = self.signs * conductances[self.matrix]
+        data = np.bincount(self.slots, weights, minlength=len(self.indices))
+        n = len(self.free)
+        A = sp.csc_matrix((data, self.indices, self.indptr), shape=(n, n))
+
+        known = self.known
+        b = conductances[known] * x[columns[known]]
+        b = np.bincount(rows[known], b, minlength=network.nodes)[self.free]
+
+        b = b[self.order]
+        x[self.free[self.order]] = self.solve(A, b)
+
+        xp = cp.get_array_module(network.voltage)
+        network.voltage = xp.asarray(x)
+
+        # currents entering the circuit from the sources
+        entries = self.currents
+        delta = x[rows[entries]] - x[columns[entries]]
+        currents = conductances[entries] * delta
+        currents = np.bincount(rows[entries], currents, minlength=network.nodes)
+        return -currents[self.sources]
+
+    def solve(self, A: sp.csc_matrix, b: np.ndarray) -> np.ndarray:
+        """
+        Solve the reduced system, already in the fill-reducing order, in the
+        precision of the context and record its relative residual. The last
+        factorization is updated instead, if the matrix is close enough to it.
+
+        Parameters
+        ----------
+        A: sp.csc_matrix
+            The matrix of the system
+        b: np.ndarray
+            The known-terms vector
+        Returns
+        -------
+        The double precision solution of the system.
+        """
+
+        if (x := self.update(A, b)) is not None:
+            return x
+
+        dtype = np.float32 if self.precision == 'mixed' else np.float64
+        self.factorized = A
+        self.factorization = splu(
+            A.astype(dtype), permc_spec='NATURAL', diag_pivot_thresh=0,
+            options=dict(SymmetricMode=True)
+        )
+        return self.refine(A, b, self.direct)
+
+    def direct(self, b: np.ndarray) -> np.ndarray:
+        """
+        Solve a system with the last factorization, in its precision.
+
+        Parameters
+        ----------
+        b: np.ndarray
+            The known-terms vector, or matrix
+        Returns
+        -------
+        The double precision solution of the system.
+        """
+        dtype = np.float32 if self.precision == 'mixed' else np.float64
+        return self.factorization.solve(b.astype(dtype)).astype(np.float64)
+
+    def update(self, A: sp.csc_matrix, b: np.ndarray) -> np.ndarray | None:
+        """
+        Solve the reduced system through a low-rank update of the last
+        factorization (i.e., the Sherman-Morrison-Woodbury formula), if the
+        nodes whose row changed since it are at most the rank of the context.
+        The change is applied as A = A0 + P M P', with P selecting the changed
+        nodes and M their block of the difference.
+
+        Parameters
+        ----------
+        A: sp.csc_matrix
+            The matrix of the system, in the order of the last factorization
+        b: np.ndarray
+            The known-terms vector
+        Returns
+        -------
+        The double precision solution of the system, or None if it needs to
+        be factorized.
+        """
+
+        if not self.rank or self.factorized is None:
+            return None
+        if self.factorized.shape != A.shape:
+            return None
+
+        # the changes that are not significant are left to the refinement
+        changes = (A - self.factorized).tocsc()
+        scale = self.threshold * np.abs(self.factorized.diagonal())
+        changes.data[np.abs(changes.data) <= scale[changes.indices]] = 0
+        changes.eliminate_zeros()
+        nodes = np.unique(changes.indices)
+        if len(nodes) > self.rank:
+            return None
+
+        self.updates += 1
+        if not len(nodes):
+            return self.refine(A, b, self.direct, self.refinements)
+
+        # the solutions of the columns of P are shared by all the solutions
+        P = np.zeros((A.shape[0], len(nodes)))
+        P[nodes, np.arange(len(nodes))] = 1
+        Z = self.direct(P)
+        M = changes[nodes][:, nodes].toarray()
+        S = np.eye(len(nodes)) + M @ Z[nodes]
+
+        def solve(r: np.ndarray) -> np.ndarray:
+            y = self.direct(r)
+            return y - Z @ np.linalg.solve(S, M @ y[nodes])
+
+        return self.refine(A, b, solve, refinements=self.refinements)
+
+    def refine(
+            self,
+            A: sp.csc_matrix,
+            b: np.ndarray,
+            solve: Callable[[np.ndarray], np.ndarray],
+            refinements: int | None = None
+    ) -> np.ndarray:
+        """
+        Solve a system with an approximate solver, correcting the solution
+        with the double precision residual until it stops improving, and
+        record its relative residual. By default, the solution is refined only
+        in mixed precision.
+
+        Parameters
+        ----------
+        A: sp.csc_matrix
+            The matrix of the system
+        b: np.ndarray
+            The known-terms vector
+        solve: Callable[[np.ndarray], np.ndarray]
+            The approximate solver of the system
+        refinements: int | None
+            The maximum number of refinement steps
+        Returns
+        -------
+        The double precision solution of the system.
+        """
+
+        if refinements is None:
+            mixed = self.precision == 'mixed'
+            refinements = self.refinements if mixed else 0
+
+        norm = np.linalg.norm(b) or 1.0
+        x = solve(b)
+        residual = b - A @ x
+        for _ in range(refinements):
+            refined = x + solve(residual)
+            update = b - A @ refined
+            if np.linalg.norm(update) >= np.linalg.norm(residual):
+                break
+            x, residual = refined, update
+
+        self.residuals.append(float(np.linalg.norm(residual) / norm))
+        return x
+
+    def moved(
+            self,
+            network: Network,
+            inputs: Dict[int, float]
+    ) -> np.ndarray | None:
+        """
+        Solve the circuit after a change of its structure through a low-rank
+        update of the last factorization. The loads only change the diagonal
+        of the reduced system, so that moving a load reuses the factorization
+        if the nodes of unknown voltage are unchanged.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        inputs: Dict[int, float]
+            A pair of node input index and applied voltage
+        Returns
+        -------
+        The currents flowing through the sources, in the sorted sources order,
+        or None if the circuit needs to be analysed again.
+        """
+
+        sources = sorted(inputs)
+        if not self.rank or self.factorized is None:
+            return None
+        if network.wires != self.wires or sources != list(self.sources):
+            return None
+
+        circuit = network.circuit
+        if not network.sparse:
+            circuit = sp.csr_matrix(cp.asnumpy(circuit))
+        L, A, b, free = reduced_system(circuit, network.wires, inputs)
+
+        A = A[self.order][:, self.order].tocsc()
+        if (solution := self.update(A, b[self.order])) is None:
+            return None
+
+        # the following solutions reuse the ordering with the new pattern
+        self.pattern(network, sources, np.argsort(self.order))
+
+        x = np.zeros(network.nodes)
+        x[sources] = [inputs[_] for _ in sources]
+        x[free[self.order]] = solution
+
+        xp = cp.get_array_module(network.voltage)
+        network.voltage = xp.asarray(x)
+        return -(L[sources] @ x)
+
+    def analyse(self, network: Network, sources: List[int]):
+        """
+        Calculate the assembly pattern of the reduced nodal system of a
+        network and its fill-reducing ordering.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        sources: List[int]
+            The sorted indices of the source nodes
+        """
+
+        self.analyses += 1
+        self.wires, self.factorized = network.wires, None
+
+        # the ordering only depends on the structure: the unit conductances
+        # system is used to compute it once
+        i, j = self.entries(network, sources)
+        n = len(self.free)
+        A = sp.csc_matrix((self.signs, (i, j)), shape=(n, n))
+        position = symmetric_factorization(A).perm_c
+        self.order = np.argsort(position)
+
+        self.pattern(network, sources, position, (i, j))
+
+    def entries(
+            self,
+            network: Network,
+            sources: List[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the role of the circuit entries in the assembly of the
+        reduced nodal system of a network.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        sources: List[int]
+            The sorted indices of the source nodes
+        Returns
+        -------
+        The row and column of each assembled entry in the reduced system.
+        """
+
+        # entries of the circuit, i.e., the conductances of its connections
+        if network.sparse:
+            rows = sparse_rows(network.circuit)
+            columns = network.circuit.indices
+        else:
+            self.gather = cp.nonzero(network.adjacency)
+            rows, columns = map(cp.asnumpy, self.gather)
+        self.rows, self.columns = rows, columns
+
+        # reduced index of the nodes of unknown voltage, -1 for the others
+        free = np.ones(network.wires, dtype=bool)
+        free[sources] = False
+        self.free = np.flatnonzero(free)
+        self.sources = np.asarray(sources, dtype=int)
+        index = np.full(network.nodes, -1)
+        index[self.free] = np.arange(len(self.free))
+        unknown = index[rows] >= 0
+
+        # entries of the off-diagonal terms and of the diagonal sums
+        off = np.flatnonzero(unknown & (index[columns] >= 0))
+        diagonal = np.flatnonzero(unknown)
+        self.matrix = np.concatenate((off, diagonal))
+        self.signs = np.repeat([-1.0, 1.0], (len(off), len(diagonal)))
+        i = index[rows[self.matrix]]
+        j = np.where(self.signs < 0, index[columns[self.matrix]], i)
+
+        # entries moving the sources voltages to the known terms
+        self.known = np.flatnonzero(unknown & np.isin(columns, sources))
+        self.currents = np.flatnonzero(np.isin(rows, sources))
+        return i, j
+
+    def pattern(
+            self,
+            network: Network,
+            sources: List[int],
+            position: np.ndarray,
+            entries: Tuple[np.ndarray, np.ndarray] | None = None
+    ):
+        """
+        Calculate the pattern of the reduced nodal system of a network, in a
+        given fill-reducing ordering.
+
+        Parameters
+        ----------
+        network: Network
+            The nanowire network circuit, either dense or sparse
+        sources: List[int]
+            The sorted indices of the source nodes
+        position: np.ndarray
+            The position of each node of unknown voltage in the ordering
+        entries: Tuple[np.ndarray, np.ndarray] | None
+            The row and column of the assembled entries, if already calculated
+        """
+
+        i, j = entries or self.entries(network, sources)
+        n = len(self.free)
+
+        # pattern of the reduced system in the new order, in CSC format
+        i, j = position[i], position[j]
+        keys, self.slots = np.unique(j * n + i, return_inverse=True)
+        self.indices = keys % n
+        self.indptr = np.cumsum(np.bincount(keys // n, minlength=n))
+        self.indptr = np.append(0, self.indptr)
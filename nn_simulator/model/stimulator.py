@@ -1,15 +1,25 @@
-import cupy as cp
+from __future__ import annotations
 
+import numpy as np
+
+from dataclasses import dataclass
+from nn_simulator import backend as cp
 from nn_simulator.model.device import Datasheet
 from nn_simulator.model.device.network import Network
-from typing import Dict
+from nn_simulator.model.solvers import SolverContext, dense_mna, sparse_mna
+from nn_simulator.model.utils import sparse_rows
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+# a solver updates the network voltages given the inputs
+Solver = Callable[[Network, Dict[int, float]], Any] | None
 
 
 def stimulate(
         graph: Network,
         datasheet: Datasheet,
         delta_time: float,
-        inputs: Dict[int, float]
+        inputs: Dict[int, float],
+        solver: Solver = None
 ):
     """
     Stimulate the network through voltage-inputs on given pins.
@@ -25,19 +35,402 @@ def stimulate(
         The time elapsed from the last update
     inputs: Dict[int, float]
         Pair of source/nodes with, for each, the correspondent voltage value
+    solver: Solver
+        The function solving the circuit (see `modified_voltage_node_analysis`)
     """
 
     # update weights of the edges. they need to be initialized
     update_conductance(graph, datasheet, delta_time)
 
     # update voltage values of the nodes of the system after the stimulation
-    modified_voltage_node_analysis(graph, inputs)
+    modified_voltage_node_analysis(graph, inputs, solver)
 
 
-def update_conductance(net: Network, datasheet: Datasheet, delta_time: float):
+def stimulate_sequence(
+        network: Network,
+        datasheet: Datasheet,
+        delta_time: float,
+        schedule: Iterable[Dict[int, float]],
+        solver: Solver = None,
+        callback: Callable[[int, Network], Any] | None = None,
+        out: cp.ndarray | None = None,
+        steady: float | None = None,
+        tolerance: float = 1e-2
+) -> cp.ndarray | None:
+    """
+    Stimulate the network with a sequence of voltage-inputs, one for each time
+    step. The buffers of the conductance update and the solver are allocated
+    once for the whole sequence. The function directly modify the passed
+    network.
+    If a steady threshold is given, the segments of constant inputs are
+    fast-forwarded once the admittance change of a step falls below it: the
+    junctions relax in closed form over several steps at once, with the
+    voltages held, and the circuit is solved only at the end of each jump (see
+    `fast_forward`). The skipped steps are still reported, with the relaxed
+    admittance and the voltages interpolated between the solutions.
+
+    Parameters
+    ----------
+    network: Network
+        The network to stimulate
+    datasheet: Datasheet
+        The datasheet of the characteristics of the device
+    delta_time: float
+        The time elapsed between two consecutive steps
+    schedule: Iterable[Dict[int, float]]
+        For each step, the pair of source/nodes with, for each, the
+        correspondent voltage value
+    solver: Solver
+        The function solving the circuit; if None and the network is in the
+        host memory, a `SolverContext` is used, keeping the system assembly
+        across the steps, otherwise the solver of `stimulate` is used
+    callback: Callable[[int, Network], Any] | None
+        Function called after each step with its index and the network
+    out: cp.ndarray | None
+        Array where to write the nodes voltages of each step, one for row
+    steady: float | None
+        The maximum admittance change of a step under constant inputs for the
+        following ones to be fast-forwarded; if None, no step is skipped
+    tolerance: float
+        The relative change of the voltages in a fast-forward jump below which
+        the following one is doubled
+    Returns
+    -------
+    The array of the voltages, if given.
+    """
+
+    xp = cp.get_array_module(network.voltage)
+    space = workspace(network)
+    schedule = list(schedule)
+
+    # the context factorizes on the host: on the device, the transfers of the
+    # system at each step would cost more than the dense solution
+    if solver is None and xp is np:
+        solver = SolverContext()
+
+    def report(index: int):
+        if out is not None:
+            out[index] = network.voltage
+        if callback is not None:
+            callback(index, network)
+
+    # admittance of the junctions before and after a step, gathered only to
+    # detect the steady state
+    if steady is not None:
+        before, after = [xp.empty_like(space.buffers[-1]) for _ in range(2)]
+
+    step, quiet = 0, False
+    while step < len(schedule):
+        inputs = schedule[step]
+
+        # fast-forward the following steps with the same inputs
+        if quiet and schedule[step - 1] == inputs:
+            end = step + 1
+            while end < len(schedule) and schedule[end] == inputs:
+                end += 1
+            fast_forward(
+                network, datasheet, delta_time, inputs, end - step, solver,
+                space, tolerance, None if out is None and callback is None
+                else lambda _, start=step: report(start + _)
+            )
+            step = end
+            continue
+
+        if steady is not None:
+            junctions_admittance(network, space, before)
+        update_conductance(network, datasheet, delta_time, space)
+        modified_voltage_node_analysis(network, inputs, solver)
+        report(step)
+
+        if steady is not None:
+            junctions_admittance(network, space, after)
+            quiet = float(abs(after - before).max()) < steady
+        step += 1
+
+    return out
+
+
+def fast_forward(
+        network: Network,
+        datasheet: Datasheet,
+        delta_time: float,
+        inputs: Dict[int, float],
+        steps: int,
+        solver: Solver,
+        space: Workspace,
+        tolerance: float,
+        report: Callable[[int], Any] | None
+):
+    """
+    Advance the network of several steps under constant inputs. The junctions
+    relax in closed form with the voltages held, and the circuit is solved at
+    the end of each jump. The jumps double while the relative change of the
+    voltages in a jump is below the tolerance, and halve otherwise. The state
+    of each step is reported, with the voltages interpolated between the
+    solutions.
+
+    Parameters
+    ----------
+    network: Network
+        The network to stimulate
+    datasheet: Datasheet
+        The datasheet of the characteristics of the device
+    delta_time: float
+        The time elapsed between two consecutive steps
+    inputs: Dict[int, float]
+        Pair of source/nodes with, for each, the correspondent voltage value
+    steps: int
+        The number of steps to advance
+    solver: Solver
+        The function solving the circuit
+    space: Workspace
+        The buffers to use for the update
+    tolerance: float
+        The relative change of the voltages in a jump below which the
+        following jump is doubled
+    report: Callable[[int], Any] | None
+        Function called with the index of each step, once it is reached; if
+        None, the intermediate states are not rebuilt
+    """
+
+    done, jump = 0, 1
+    while done < steps:
+        jump = min(jump, steps - done)
+        junctions_rates(network, datasheet, space)
+        rates = [_.copy() for _ in space.buffers] if report else []
+
+        voltage = network.voltage.copy()
+        relax_junctions(network, datasheet, jump * delta_time, space)
+        modified_voltage_node_analysis(network, inputs, solver)
+        final = network.voltage
+
+        # rebuild the state of each step of the jump, ending in the final one
+        for step in range(1, jump + 1 if report else 1):
+            for buffer, value in zip(space.buffers, rates):
+                buffer[:] = value
+            relax_junctions(network, datasheet, step * delta_time, space)
+            fraction = step / jump
+            network.voltage = final if step == jump else (
+                voltage + (final - voltage) * fraction
+            )
+            report(done + step - 1)
+        done += jump
+
+        # the rates only depend on the voltages: while these are almost
+        # unchanged, the held-voltages relaxation is accurate on longer jumps
+        change = float(abs(final - voltage).max())
+        change /= max(float(abs(voltage).max()), 1e-12)
+        jump = 2 * jump if change < tolerance else max(1, jump // 2)
+
+
+def junctions_admittance(network: Network, space: Workspace, out: cp.ndarray):
+    """
+    Gather the admittance of the junctions in the workspace order.
+
+    Parameters
+    ----------
+    network: Network
+        The network from which take the admittance
+    space: Workspace
+        The workspace of the network
+    out: cp.ndarray
+        The vector where to store the admittance
+    """
+    xp = cp.get_array_module(network.voltage)
+    admittance = network.admittance
+    admittance = admittance.data if network.sparse else admittance
+    xp.take(admittance, space.entries, out=out)
+
+
+def stimulate_adaptive(
+        network: Network,
+        datasheet: Datasheet,
+        delta_time: float,
+        inputs: Dict[int, float],
+        tolerance: float = 1e-2,
+        min_step: float | None = None,
+        solver: Solver = None,
+        space: Workspace | None = None
+) -> int:
+    """
+    Stimulate the network through voltage-inputs on given pins, dividing the
+    time interval in sub-steps. Each sub-step is the largest one that, with
+    the current junctions rates, changes the admittance of every junction less
+    than the tolerance, relatively to its [0-1] range. So, switching junctions
+    get small steps, while quiescent ones let the interval be covered by a
+    single step. Differently from `stimulate`, the circuit is solved with the
+    new inputs before the first update. The function directly modify the
+    passed network.
+
+    Parameters
+    ----------
+    network: Network
+        The network to stimulate
+    datasheet: Datasheet
+        The datasheet of the characteristics of the device
+    delta_time: float
+        The time elapsed from the last update
+    inputs: Dict[int, float]
+        Pair of source/nodes with, for each, the correspondent voltage value
+    tolerance: float
+        The maximum relative change of the junctions admittance in a sub-step
+    min_step: float | None
+        The minimum length of a sub-step; if None, it is a thousandth of the
+        time interval
+    solver: Solver
+        The function solving the circuit (see `modified_voltage_node_analysis`)
+    space: Workspace | None
+        The buffers to use for the update; if None, they are allocated
+    Returns
+    -------
+    The number of solutions of the circuit, i.e., of sub-steps, performed.
+    """
+
+    space = space or workspace(network)
+    min_step = min_step or delta_time / 1000
+
+    # solve the circuit with the new inputs, for the rates to follow them
+    modified_voltage_node_analysis(network, inputs, solver)
+
+    remaining, solves = delta_time, 1
+    while remaining > 1e-9 * delta_time:
+        junctions_rates(network, datasheet, space)
+
+        step = adaptive_step(space, tolerance)
+        step = min(max(step, min_step), remaining)
+        relax_junctions(network, datasheet, step, space)
+        modified_voltage_node_analysis(network, inputs, solver)
+
+        remaining -= step
+        solves += 1
+    return solves
+
+
+def adaptive_step(space: Workspace, tolerance: float) -> float:
+    """
+    Calculate the largest time step that keeps the relative change of the
+    junctions admittance below the tolerance, given their rates.
+
+    Parameters
+    ----------
+    space: Workspace
+        The buffers with the junctions rates (see `junctions_rates`)
+    tolerance: float
+        The maximum relative change of the junctions admittance
+    Returns
+    -------
+    The length of the step; it is infinite if no junction limits it.
+    """
+
+    xp = cp.get_array_module(space.adjacency)
+    kpd, kp, _, change, G = space.buffers
+
+    # the admittance exponentially approaches the equilibrium value kp/kpd:
+    # after a step t it has covered (1 - e^(-kpd*t)) of the distance
+    xp.divide(kp, kpd, out=change)
+    change -= G
+    xp.absolute(change, out=change)
+    ratio = tolerance / xp.maximum(change, 1e-30)
+
+    limited = ratio < 1
+    if not limited.any():
+        return float('inf')
+    steps = -xp.log1p(-ratio[limited]) / kpd[limited]
+    return float(steps.min())
+
+
+@dataclass
+class Workspace:
+    """
+    Buffers of the conductance update of a network, allocated once to be
+    reused by the following updates. The update only runs on the device
+    junctions, taken once from the upper triangle of the symmetric matrices.
+    The structure of the network (e.g., the loads connections) must not change
+    while the workspace is in use.
+
+    Fields
+    ------
+    rows: cp.ndarray
+        lower node of each junction
+    columns: cp.ndarray
+        higher node of each junction
+    entries: cp.ndarray
+        position of each junction in the matrices values, i.e., the flattened
+        matrices for dense networks and their data for sparse ones
+    mirror: cp.ndarray
+        position of the symmetric entry of each junction in the matrices values
+    adjacency: cp.ndarray
+        adjacency value of each junction
+    buffers: Tuple[cp.ndarray, ...]
+        temporary vectors of the update, with an element for each junction
+    """
+
+    rows: cp.ndarray
+    columns: cp.ndarray
+    entries: cp.ndarray
+    mirror: cp.ndarray
+    adjacency: cp.ndarray
+    buffers: Tuple[cp.ndarray, ...]
+
+
+def workspace(network: Network) -> Workspace:
+    """
+    Allocate the buffers of the conductance update of a network.
+
+    Parameters
+    ----------
+    network: Network
+        The network of which update the conductance
+    Returns
+    -------
+    A workspace for the updates of the network conductance.
+    """
+
+    xp = cp.get_array_module(network.voltage)
+    nodes = network.nodes
+
+    # consider only the device junctions, i.e., exclude the external grounds
+    if network.sparse:
+        adjacency = network.adjacency
+        rows, columns = sparse_rows(adjacency), adjacency.indices
+        keys = rows.astype(np.int64) * nodes + columns
+        order = np.argsort(keys)
+        junctions = rows < columns
+    else:
+        adjacency = network.device.adjacency
+        rows, columns = xp.nonzero(xp.triu(adjacency))
+        junctions = slice(None)
+    rows, columns = rows[junctions], columns[junctions]
+    device = nodes - network.external_grounds
+    device = (rows < device) & (columns < device)
+    rows, columns = rows[device], columns[device]
+
+    # position of the junctions and of their symmetric in the values
+    entries, mirror = rows * nodes + columns, columns * nodes + rows
+    if network.sparse:
+        entries, mirror = [
+            order[np.searchsorted(keys, _, sorter=order)]
+            for _ in (entries, mirror)
+        ]
+        values = adjacency.data[entries]
+    else:
+        values = adjacency[rows, columns]
+
+    buffers = [xp.empty(len(rows)) for _ in range(4)]
+    buffers.append(xp.empty(len(rows), dtype=network.admittance.dtype))
+    return Workspace(rows, columns, entries, mirror, values, tuple(buffers))
+
+
+def update_conductance(
+        net: Network,
+        datasheet: Datasheet,
+        delta_time: float,
+        space: Workspace | None = None
+):
     """
     Update weights of the nanowires junctions. The original model was developed
-    by Enrique Miranda.
+    by Enrique Miranda. The update is computed only on the junctions and it is
+    written in place in the network matrices.
 
     Parameters
     ----------
@@ -47,73 +440,212 @@ def update_conductance(net: Network, datasheet: Datasheet, delta_time: float):
         The device specification
     delta_time: float
         Time elapsed from the last update
+    space: Workspace | None
+        The buffers to use for the update; if None, they are allocated
+    """
+
+    space = space or workspace(net)
+    junctions_rates(net, datasheet, space)
+    relax_junctions(net, datasheet, delta_time, space)
+
+
+def junctions_rates(net: Network, datasheet: Datasheet, space: Workspace):
     """
+    Calculate the excitation and depression rate coefficients of the junctions
+    in the workspace buffers, together with their admittance.
 
-    A = net.adjacency[:-net.external_grounds, :-net.external_grounds]
-    G = net.admittance[:-net.external_grounds, :-net.external_grounds]
-    V = net.voltage[:-net.external_grounds]
+    Parameters
+    ----------
+    net: Network
+        The network of which calculate the rates
+    datasheet: Datasheet
+        The device specification
+    space: Workspace
+        The buffers where to store the rates
+    """
+
+    xp = cp.get_array_module(net.voltage)
+    delta_v, kp, kd, _, G = space.buffers
+    A = space.adjacency
 
     # calculate delta voltage on a junction
-    delta_v = cp.absolute(V.reshape(-1, 1) - A * V)
+    admittance = net.admittance.data if net.sparse else net.admittance
+    xp.take(admittance, space.entries, out=G)
+    V = net.voltage.astype(delta_v.dtype, copy=False)
+    xp.take(V, space.columns, out=kp)
+    xp.take(V, space.rows, out=delta_v)
+    kp *= A
+    delta_v -= kp
+    xp.absolute(delta_v, out=delta_v)
+
+    rate_coefficients(datasheet, delta_v, kp, kd, out=delta_v)
+
+
+def relax_junctions(
+        net: Network,
+        datasheet: Datasheet,
+        delta_time: float,
+        space: Workspace
+):
+    """
+    Update the junctions admittance and conductance after a time interval,
+    with the rates in the workspace buffers (see `junctions_rates`).
+
+    Parameters
+    ----------
+    net: Network
+        The network of which update the conductance
+    datasheet: Datasheet
+        The device specification
+    delta_time: float
+        Time elapsed from the last update
+    space: Workspace
+        The buffers with the junctions rates
+    """
 
-    # excitation and depression rate coefficients
-    kp = datasheet.kp0 * cp.exp(datasheet.eta_p * delta_v)
-    kd = datasheet.kd0 * cp.exp(-datasheet.eta_d * delta_v)
-    kpd = kp + kd
+    xp = cp.get_array_module(net.voltage)
+    kpd, kp, kd, partial, G = space.buffers
+    A = space.adjacency
 
-    # calculate and set admittance [0-1]
-    partial = kd / kp * G * cp.exp(-delta_time * kpd)
-    G = A * kp / kpd * (1 + partial)
-    net.admittance[:-net.external_grounds, :-net.external_grounds] = G
+    relaxed_admittance(delta_time, kpd, kp, kd, G, A, out=partial)
 
-    # calculate and set circuit conductance
-    partial = G * (datasheet.Y_max - datasheet.Y_min)
-    Y = A * (datasheet.Y_min + partial)
-    net.circuit[:-net.external_grounds, :-net.external_grounds] = Y
+    # set admittance and calculate and set circuit conductance, on both the
+    # symmetric entries. the values are flattened for dense networks
+    def values(matrix): return matrix.data if net.sparse else matrix
+    for entries in (space.entries, space.mirror):
+        xp.put(values(net.admittance), entries, partial)
+    junctions_conductance(datasheet, partial, A, out=partial)
+    for entries in (space.entries, space.mirror):
+        xp.put(values(net.circuit), entries, partial)
 
 
-def modified_voltage_node_analysis(network: Network, inputs: Dict[int, float]):
+def rate_coefficients(
+        datasheet: Datasheet,
+        delta_v: cp.ndarray,
+        kp: cp.ndarray,
+        kd: cp.ndarray,
+        out: cp.ndarray
+):
     """
-    Execute the Modified Nodal Analysis for voltages calculation.
+    Calculate the excitation and depression rate coefficients of junctions
+    from their voltage drop. The arrays may have any shape, e.g., a leading
+    batch dimension, as long as they broadcast together.
 
     Parameters
     ----------
-    network: Network
-        The nanowire network circuit
-    inputs: Dict[int, float]
-        A pair of node input index and applied voltage
+    datasheet: Datasheet
+        The device specification
+    delta_v: cp.ndarray
+        The absolute voltage drop on the junctions
+    kp: cp.ndarray
+        Where to store the excitation rate coefficients
+    kd: cp.ndarray
+        Where to store the depression rate coefficients
+    out: cp.ndarray
+        Where to store the sum of the rate coefficients; it can be `delta_v`
+    """
+
+    xp = cp.get_array_module(delta_v)
+    xp.multiply(delta_v, datasheet.eta_p, out=kp)
+    xp.exp(kp, out=kp)
+    kp *= datasheet.kp0
+    xp.multiply(delta_v, -datasheet.eta_d, out=kd)
+    xp.exp(kd, out=kd)
+    kd *= datasheet.kd0
+    xp.add(kp, kd, out=out)
+
+
+def relaxed_admittance(
+        delta_time: float,
+        kpd: cp.ndarray,
+        kp: cp.ndarray,
+        kd: cp.ndarray,
+        G: cp.ndarray,
+        A: cp.ndarray,
+        out: cp.ndarray
+):
+    """
+    Calculate the admittance of junctions after a time interval, from their
+    rate coefficients (see `rate_coefficients`). The arrays may have any
+    shape, as long as they broadcast together.
+
+    Parameters
+    ----------
+    delta_time: float
+        Time elapsed from the last update
+    kpd: cp.ndarray
+        The sum of the rate coefficients
+    kp: cp.ndarray
+        The excitation rate coefficients; they are overwritten
+    kd: cp.ndarray
+        The depression rate coefficients
+    G: cp.ndarray
+        The admittance of the junctions at the start of the interval
+    A: cp.ndarray
+        The adjacency of the junctions
+    out: cp.ndarray
+        Where to store the admittance; it must not be `G`
     """
 
-    # create a vector to contain the voltages of the input nodes
-    # the ground nodes are not present
-    voltages = [v for _, v in sorted(inputs.items())]
-    voltages = cp.asarray(voltages, dtype=cp.float32)
-    Z = cp.append(cp.zeros(network.wires), voltages)
+    # admittance [0-1]: kp / kpd * (1 + kd / kp * G * e^(-t*kpd))
+    xp = cp.get_array_module(kpd)
+    xp.multiply(kpd, -delta_time, out=out)
+    xp.exp(out, out=out)
+    out *= G
+    out *= kd
+    out /= kpd
+    kp /= kpd
+    out += kp
+    out *= A
+
 
-    # create a vector to identify the sources (1: source, 0: non-source)
-    # each column contains only one '1': there is 1 column for each source
-    B = cp.zeros((network.wires, len(inputs)))
-    for idx, source in enumerate(inputs):
-        B[source][idx] = 1
+def junctions_conductance(
+        datasheet: Datasheet,
+        G: cp.ndarray,
+        A: cp.ndarray,
+        out: cp.ndarray
+):
+    """
+    Calculate the circuit conductance of junctions from their admittance.
+    The arrays may have any shape, as long as they broadcast together.
+
+    Parameters
+    ----------
+    datasheet: Datasheet
+        The device specification
+    G: cp.ndarray
+        The admittance of the junctions
+    A: cp.ndarray
+        The adjacency of the junctions
+    out: cp.ndarray
+        Where to store the conductance; it can be `G`
+    """
 
-    # stores the sum of the conductances of the edges incident on a node
-    # each row refer to a specific node and the index r,c represent the
-    # conductance in the arch from node r to c
-    G = cp.negative(network.circuit)
-    summa = cp.negative(cp.sum(G, axis=1))
-    cp.fill_diagonal(G, summa)
+    xp = cp.get_array_module(G)
+    xp.multiply(G, datasheet.Y_max - datasheet.Y_min, out=out)
+    out += datasheet.Y_min
+    out *= A
 
-    # add sources identifiers as the last column of the matrix
-    Y = cp.hstack((G[:-network.grounds, :-network.grounds], B))
 
-    # add a slot in the sources array
-    B = cp.vstack((B, cp.zeros((len(inputs), len(inputs)))))
-    B = cp.transpose(B)
+def modified_voltage_node_analysis(
+        network: Network,
+        inputs: Dict[int, float],
+        solver: Solver = None
+):
+    """
+    Execute the Modified Nodal Analysis for voltages calculation.
 
-    # construct Y matrix as a combination of G, B, D in the form [(G B); (B' D)]
-    # add the sources also to the bottom of the matrix
-    Y = cp.vstack((Y, B))
+    Parameters
+    ----------
+    network: Network
+        The nanowire network circuit
+    inputs: Dict[int, float]
+        A pair of node input index and applied voltage
+    solver: Solver
+        The function solving the circuit; if None, a dense solver is used for
+        dense networks and a sparse one for sparse networks
+    """
 
-    # perform analysis of the circuit (Yx = z -> x = Y^(-1)z)
-    network.voltage = cp.linalg.solve(Y, Z)[:-len(inputs)]
-    network.voltage = cp.pad(network.voltage, (0, network.grounds))
+    if solver is None:
+        solver = sparse_mna if network.sparse else dense_mna
+    solver(network, inputs)
@@ -1,10 +1,85 @@
-import cupy as cp
+from __future__ import annotations
 
+import numpy as np
+import scipy.sparse as sp
 
-def stack(matrix: cp.ndarray, array: cp.ndarray) -> cp.ndarray:
-    # add row to bottom
-    matrix = cp.vstack([matrix, array])
+from nn_simulator import backend as cp
 
-    # transform to column and add to right
-    array = cp.pad(array, (0, 1), 'constant').reshape(-1, 1)
-    return cp.hstack([matrix, array])
+
+def expand(
+        matrix: cp.ndarray | sp.csr_matrix,
+        count: int
+) -> cp.ndarray | sp.csr_matrix:
+    # add empty rows on bottom and empty columns on right
+    n = matrix.shape[0]
+    if sp.issparse(matrix):
+        indptr = np.pad(matrix.indptr, (0, count), 'edge')
+        return sp.csr_matrix(
+            (matrix.data, matrix.indices, indptr), shape=(n + count, n + count)
+        )
+
+    xp = cp.get_array_module(matrix)
+    expanded = xp.zeros((n + count, n + count), dtype=matrix.dtype)
+    expanded[:n, :n] = matrix
+    return expanded
+
+
+def insert(
+        matrix: sp.csr_matrix,
+        rows: np.ndarray,
+        columns: np.ndarray,
+        values: np.ndarray
+) -> sp.csr_matrix:
+    # add new entries to the structure, keeping the explicit zeros
+    coo = matrix.tocoo()
+    matrix = sp.csr_matrix((
+        np.concatenate((coo.data, values)),
+        (np.concatenate((coo.row, rows)), np.concatenate((coo.col, columns)))
+    ), shape=matrix.shape)
+    matrix.sort_indices()
+    return matrix.astype(np.float32)
+
+
+def assign(
+        matrix: sp.csr_matrix,
+        rows: np.ndarray,
+        columns: np.ndarray,
+        values: np.ndarray
+) -> sp.csr_matrix:
+    # write the stored entries in place, and add the others to the structure
+    found = positions(matrix, rows, columns)
+    stored = found >= 0
+    matrix.data[found[stored]] = values[stored]
+    if stored.all():
+        return matrix
+    missing = ~stored
+    return insert(matrix, rows[missing], columns[missing], values[missing])
+
+
+def positions(
+        matrix: sp.csr_matrix,
+        rows: np.ndarray,
+        columns: np.ndarray
+) -> np.ndarray:
+    # position in the data of each entry, -1 for the ones not stored
+    if not matrix.has_sorted_indices:
+        matrix.sort_indices()
+    n = matrix.shape[0]
+    keys = sparse_rows(matrix).astype(np.int64) * n + matrix.indices
+    targets = rows.astype(np.int64) * n + columns
+    found = np.searchsorted(keys, targets)
+    stored = found < len(keys)
+    stored[stored] = keys[found[stored]] == targets[stored]
+    return np.where(stored, found, -1)
+
+
+def clear(matrix: sp.csr_matrix, nodes: np.ndarray):
+    # zero the entries of the rows and columns of the nodes, keeping them
+    # stored in the structure
+    rows = sparse_rows(matrix)
+    matrix.data[np.isin(rows, nodes) | np.isin(matrix.indices, nodes)] = 0
+
+
+def sparse_rows(matrix: sp.csr_matrix) -> np.ndarray:
+    # row index of each stored entry of a CSR matrix
+    return np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
-import cupy as cp
+import scipy.sparse as sp
 
 from collections import Counter
 from functools import reduce
 from itertools import product, chain, cycle, groupby
 from matplotlib.animation import FuncAnimation, ImageMagickWriter
 from more_itertools import flatten
+from nn_simulator import backend as cp
 from nn_simulator.model.analysis.evolution import Evolution
 from nn_simulator.model.device.networks import nn2nx
 from nn_simulator.view.utils import *
@@ -32,7 +33,13 @@ def plot(data: Evolution, filler: Callable[[Any, Any, Evolution], None]):
 
 
 def adjacency_matrix(_0, _1, plot_data: Evolution, **_2):
-    plt.imshow(plot_data.wires_dict['adj_matrix'], cmap='binary')
+    matrix = plot_data.wires_dict['adj_matrix']
+
+    # draw only the non-zero entries of a sparse matrix
+    if sp.issparse(matrix):
+        plt.spy(matrix, color='k', markersize=1)
+    else:
+        plt.imshow(matrix, cmap='binary')
 
 
 def nanowires_distribution(_0, ax, plot_data: Evolution, **_1):
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import subprocess
+import sys
+
+from nn_simulator import backend
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.stimulator import stimulate
+
+
+@pytest.fixture
+def numpy_backend(monkeypatch):
+    monkeypatch.setattr(backend, '__module', None)
+    monkeypatch.setenv(backend.VARIABLE, 'numpy')
+    yield
+    monkeypatch.setattr(backend, '__module', None)
+
+
+def test_selection(numpy_backend):
+    assert backend.current() is np
+    assert isinstance(backend.zeros(3), np.ndarray)
+    assert backend.get_array_module(np.zeros(3)) is np
+
+    assert backend.use('numpy') is np
+    with pytest.raises(ValueError):
+        backend.use('torch')
+
+
+def test_lazy_selection():
+    # importing the library must not select the backend, for the environment
+    # variable and `use` to be honoured after the import
+    script = (
+        'import pkgutil, importlib, nn_simulator;'
+        '[importlib.import_module(_.name) for _ in pkgutil.walk_packages('
+        'nn_simulator.__path__, "nn_simulator.")];'
+        'from nn_simulator import backend;'
+        'assert getattr(backend, "__module") is None'
+    )
+    subprocess.run([sys.executable, '-c', script], check=True)
+
+
+def test_cpu_stimulation(numpy_backend):
+    datasheet = Datasheet(wires_count=100, Lx=50, Ly=50)
+    data = generate_network_data(datasheet)
+
+    dense, sparse = [
+        nanowire_network(data, datasheet.Y_min, sparse=_) for _ in (False, True)
+    ]
+    for network in (dense, sparse):
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        for _ in range(5):
+            stimulate(network, datasheet, 0.05, {0: 5.0})
+
+    # the dense network lives in the host memory as the sparse one
+    assert isinstance(dense.admittance, np.ndarray)
+    assert isinstance(dense.voltage, np.ndarray)
+    assert np.allclose(dense.voltage, sparse.voltage, atol=1e-5)
+    assert np.allclose(
+        dense.admittance, sparse.admittance.toarray(), atol=1e-5
+    )
@@ -1,11 +1,14 @@
 import json
 import networkx as nx
 import numpy as np
+import pytest
 
 from itertools import product
 from nn_simulator import *
 from nn_simulator.logger import *
 from nn_simulator.model.device.factory import largest_connected_component
+from nn_simulator.model.solvers import SolverContext, dense_mna, reduced_spd
+from nn_simulator.model.solvers import sparse_mna
 from test.model.device.utils import equals
 
 
@@ -38,7 +41,10 @@ def test_data_equality():
             assert value_a == value_b
 
 
-def test_original_behaviour():
+@pytest.mark.parametrize(
+    'solver', [dense_mna, sparse_mna, reduced_spd, SolverContext()]
+)
+def test_original_behaviour(solver):
     """Test that the modified simulator behaves as the original one"""
 
     # generate the network
@@ -77,7 +83,7 @@ def test_original_behaviour():
     logging.debug('Growth of the conductive path')
 
     # first stimulation comparison
-    stimulate(network, default, delta_t, dict([stimulation[0]]))
+    stimulate(network, default, delta_t, dict([stimulation[0]]), solver)
 
     expected = import_graph('test/changes/stimulation_1.dat')
     expected = nx2nn(expected)
@@ -87,7 +93,7 @@ def test_original_behaviour():
 
     # growth over time
     for signal in stimulation[1:]:
-        stimulate(network, default, delta_t, dict([signal]))
+        stimulate(network, default, delta_t, dict([signal]), solver)
 
     expected = import_graph('test/changes/stimulation.dat')
     expected = nx2nn(expected)
@@ -1,5 +1,6 @@
-import cupy as cp
+import scipy.sparse as sp
 
+from nn_simulator import backend as cp
 from nn_simulator import default as i_default
 from nn_simulator.controller.backup import save, exist, read
 from nn_simulator.model.device.factory import nanowire_network
@@ -26,3 +27,16 @@ def test_save_and_import_completeness():
         assert cp.allclose(v, f_data[k])
 
     assert i_connections == f_connections
+
+
+def test_save_and_import_sparse_adjacency():
+    i_data = generate_network_data(i_default, sparse=True)
+    i_nn = nanowire_network(i_data, 0.2, 3)
+
+    save(i_default, i_nn, i_data, dict())
+    f_nn, _, f_data, _ = read()
+
+    equals(i_nn, f_nn)
+
+    assert sp.issparse(f_data['adj_matrix'])
+    assert (i_data['adj_matrix'] != f_data['adj_matrix']).nnz == 0
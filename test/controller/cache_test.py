@@ -0,0 +1,62 @@
+import numpy as np
+import os
+import scipy.sparse as sp
+
+from nn_simulator import backend as cp
+from nn_simulator.controller import cache
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from test.model.device.utils import equals
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    i_nn, i_data = cache.generate(datasheet, 0.2, 1, directory=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    # a cache hit must not generate the network again
+    def fail(*_): raise AssertionError('the network has been generated')
+    monkeypatch.setattr(cache, 'generate_network_data', fail)
+
+    f_nn, f_data = cache.generate(datasheet, 0.2, 1, directory=str(tmp_path))
+
+    equals(i_nn, f_nn)
+    assert isinstance(f_nn.circuit, cp.ndarray)
+    assert i_data.keys() == f_data.keys()
+    for k, v in i_data.items():
+        assert type(v) == type(f_data[k])
+        assert np.array_equal(v, f_data[k])
+
+
+def test_cache_key():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+
+    assert cache.key(datasheet) == cache.key(Datasheet(300, Lx=150, Ly=150))
+    assert cache.key(datasheet) != cache.key(Datasheet(300, Lx=150, Ly=151))
+    assert cache.key(datasheet) != cache.key(Datasheet(300, Lx=150, seed=1))
+    assert cache.key(datasheet, grounds=0) != cache.key(datasheet, grounds=1)
+
+
+def test_cache_sparse_and_eviction(tmp_path):
+    directory = str(tmp_path)
+    datasheets = [Datasheet(300, Lx=150, Ly=150, seed=_) for _ in range(3)]
+
+    def generate(datasheet, max_size=2 ** 30):
+        return cache.generate(
+            datasheet, 0.2, sparse=True, directory=directory, max_size=max_size
+        )
+
+    _, wires = generate(datasheets[0])
+    assert sp.issparse(wires['adj_matrix'])
+    size = os.path.getsize(os.path.join(directory, os.listdir(directory)[0]))
+
+    # the cache can contain only two entries: the least recent is removed
+    generate(datasheets[1])
+    generate(datasheets[0])
+    generate(datasheets[2], max_size=int(size * 2.5))
+
+    entries = {_.split('.')[0] for _ in os.listdir(directory)}
+    assert entries == {
+        cache.key(
+            datasheets[_], initial_conductance=0.2, grounds=0, sparse=True
+        ) for _ in (0, 2)
+    }
@@ -0,0 +1,121 @@
+import numpy as np
+import scipy.sparse as sp
+
+from nn_simulator.model.analysis.evolution import Evolution, Recording
+from nn_simulator.model.analysis.utils import calculate_currents
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.network import copy
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.stimulator import stimulate, stimulate_sequence
+
+
+def test_compact_history():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    schedule = [{0: 5.00}] * 5 + [{0: 0.10}] * 5
+
+    def dense(matrix):
+        return matrix.toarray() if sp.issparse(matrix) else matrix
+
+    for sparse in (False, True):
+        network = nanowire_network(data, datasheet.Y_min, sparse=sparse)
+        connect(network, wire_idx=3, resistance=1 / datasheet.Y_min)
+
+        # record the history and, as reference, a copy of each state
+        evolution = Evolution(datasheet, dict(), 0.05, {3: 1 / datasheet.Y_min})
+        states = []
+
+        def record(step, graph):
+            evolution.append(graph, schedule[step])
+            states.append(copy(graph.device))
+
+        stimulate_sequence(network, datasheet, 0.05, schedule, callback=record)
+
+        # only the junctions and the nodes state is stored for each step
+        junctions = len(network.device.junctions[0])
+        assert evolution.admittances.shape[1] == junctions
+        assert len(evolution.instances) == len(schedule)
+
+        for (graph, stimulus), state, step in zip(
+                evolution.instances, states, schedule
+        ):
+            assert stimulus == step
+            assert graph.sparse == sparse
+            assert np.allclose(graph.voltage, state.voltage)
+            assert np.allclose(dense(graph.admittance), dense(state.admittance))
+            assert np.allclose(
+                dense(graph.circuit), dense(state.circuit), rtol=1e-5, atol=0
+            )
+
+        currents = next(evolution.currents_graphs(reverse=True)).currents
+        expected = calculate_currents(states[-1])
+        assert np.allclose(dense(currents), dense(expected), rtol=1e-4)
+        assert evolution.inputs == schedule[-1]
+        assert evolution.instances[-1][0].nodes == evolution.graph.nodes
+
+
+def test_derived_conductance():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    network = nanowire_network(generate_network_data(datasheet), 0.2)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    evolution = Evolution(datasheet, dict(), 0.05)
+    evolution.append(network, dict())
+    stimulate(network, datasheet, 0.05, {0: 5.00})
+    evolution.append(network, {0: 5.00})
+
+    # only the initial conductance is not derived from the admittance
+    assert list(evolution.circuits) == [0]
+    initial, _ = evolution.instances[0]
+    assert np.allclose(initial.circuit, 0.2 * initial.adjacency)
+    assert np.allclose(evolution.graph.circuit, network.device.circuit)
+    assert evolution.inputs == {0: 5.00}
+
+
+def test_recording_policy():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    network = nanowire_network(data, datasheet.Y_min, sparse=True)
+    schedule = [{0: 5.00}] * 7 + [{0: 0.10}] * 7
+
+    # keep the last 4 of a step every 3, with the voltages of two nodes
+    recording = Recording(every=3, last=4, nodes=(0, 5), half=True)
+    evolution = Evolution(datasheet, dict(), 0.05, recording=recording)
+    voltages = Evolution(
+        datasheet, dict(), 0.05, recording=Recording(admittance=False)
+    )
+    states = []
+
+    def record(step, graph):
+        evolution.append(graph, schedule[step])
+        voltages.append(graph, schedule[step])
+        states.append(copy(graph))
+
+    stimulate_sequence(network, datasheet, 0.05, schedule, callback=record)
+
+    # the memory is bounded by the ring buffer and the selected fields
+    assert evolution.admittances.shape[0] == 4
+    assert evolution.admittances.dtype == np.float16
+    assert evolution.voltages.shape == (4, 2)
+    assert voltages.admittances.shape[1] == 0
+
+    steps = [3, 6, 9, 12]
+    assert len(evolution.instances) == len(steps)
+    assert np.allclose(evolution.update_times, np.multiply(steps, 0.05))
+    for (graph, stimulus), step in zip(evolution.instances, steps):
+        state = states[step]
+        assert stimulus == schedule[step]
+        assert np.allclose(graph.voltage[[0, 5]], state.voltage[[0, 5]])
+        assert np.allclose(
+            graph.admittance.toarray(), state.admittance.toarray(),
+            rtol=1e-3, atol=1e-4
+        )
+
+    # the fields that are not recorded are not available
+    graph, _ = evolution.instances[-1]
+    assert np.isnan(np.delete(graph.voltage, [0, 5])).all()
+    graph, _ = voltages.instances[-1]
+    assert np.allclose(graph.voltage, states[-1].voltage)
+    assert np.isnan(graph.admittance.data).all()
+    assert np.isnan(graph.circuit.data).all()
@@ -0,0 +1,55 @@
+from nn_simulator import backend as cp
+from nn_simulator.model.batch import instance, replicate, stimulate_batch
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.device.network import copy
+from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.solvers import reduced_spd
+from nn_simulator.model.stimulator import stimulate
+
+
+def batch_stimulation(sparse: bool):
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    network = nanowire_network(data, datasheet.Y_min, sparse=sparse)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+
+    signals = [1.00, 5.00, 10.00]
+    networks = [copy(network, ram=False) for _ in signals]
+    batch = replicate(network, len(signals))
+
+    for _ in range(5):
+        for n, signal in zip(networks, signals):
+            stimulate(n, datasheet, 0.05, {0: signal, 7: 1.00}, reduced_spd)
+        inputs = {0: cp.asarray(signals), 7: 1.00}
+        stimulate_batch(batch, datasheet, 0.05, inputs)
+
+    assert batch.voltage.shape == (len(signals), network.nodes)
+    for index, n in enumerate(networks):
+        element = instance(batch, index)
+        assert cp.allclose(element.voltage, n.voltage, atol=1e-6)
+        if sparse:
+            assert abs(element.circuit - n.circuit).max() < 1e-6
+        else:
+            assert cp.allclose(element.circuit, n.circuit, atol=1e-6)
+
+
+def test_batch_stimulation():
+    batch_stimulation(sparse=False)
+
+
+def test_sparse_batch_stimulation():
+    batch_stimulation(sparse=True)
+
+
+def test_shared_conductances():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    network = nanowire_network(generate_network_data(datasheet), 0.2)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    batch = replicate(network, 2)
+
+    # the first step starts from the same state: the inputs are the ones to
+    # differ, and they are solved on the same system
+    stimulate_batch(batch, datasheet, 0.05, {0: cp.asarray([2.00, 4.00])})
+    assert cp.allclose(2 * batch.voltage[0], batch.voltage[1])
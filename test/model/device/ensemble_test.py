@@ -0,0 +1,50 @@
+import os
+
+from nn_simulator.controller import cache
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.datasheet.factory import from_density
+from nn_simulator.model.device.ensemble import summary
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.networks import generate_network_data
+
+
+def test_ensemble_summary():
+    datasheets = [
+        *(Datasheet(wires_count=200, Lx=100, Ly=100, seed=_) for _ in range(4)),
+        *(from_density(_, 100, 40.0) for _ in (2.0, 4.0, 8.0))
+    ]
+
+    table = summary(iter(datasheets), processes=2)
+
+    assert [*table['index']] == [*range(len(datasheets))]
+    for row, datasheet in zip(table, datasheets):
+        wires_dict = generate_network_data(datasheet)
+        network = nanowire_network(wires_dict, 0.2)
+
+        assert row['seed'] == datasheet.seed
+        assert row['wires'] == datasheet.wires_count
+        assert row['junctions'] == wires_dict['number_of_junctions']
+        assert row['lcc_wires'] == network.wires
+        assert row['lcc_junctions'] == int(network.adjacency.sum()) // 2
+
+
+def test_ensemble_cache_and_empty_devices(tmp_path, monkeypatch):
+    cached = dict(initial_conductance=0.2, directory=str(tmp_path))
+    datasheets = [
+        Datasheet(wires_count=200, Lx=100, Ly=100),
+        Datasheet(wires_count=2, Lx=1000, Ly=1000)
+    ]
+
+    table = summary(datasheets, processes=2, cached=cached)
+
+    # the device without junctions does not fail the ensemble
+    assert table[1]['junctions'] == 0 and table[1]['lcc_junctions'] == 0
+
+    # the generated device is read back from the cache
+    def fail(*_): raise AssertionError('the network has been generated')
+    monkeypatch.setattr(cache, 'generate_network_data', fail)
+
+    network, wires_dict = cache.generate(datasheets[0], sparse=True, **cached)
+    assert len(os.listdir(tmp_path)) == 1
+    assert table[0]['junctions'] == wires_dict['number_of_junctions']
+    assert table[0]['lcc_wires'] == network.wires
@@ -1,8 +1,12 @@
-import cupy as cp
-
-from nn_simulator.model.device.datasheet.Datasheet import default
-from nn_simulator.model.interface.connector import connect
-from test.model.device.utils import simple_network
+from nn_simulator import backend as cp
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet, default
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.network import copy
+from nn_simulator.model.device.networks import generate_network_data, nn2nx
+from nn_simulator.model.device.networks import nx2nn
+from nn_simulator.model.interface.connector import attach, connect, detach
+from nn_simulator.model.interface.connector import disconnect, reserve
+from test.model.device.utils import equals, simple_network
 
 
 def test_load_connection():
@@ -38,3 +42,89 @@ def test_load_connection():
     connect(network, wire_idx=2, resistance=1 / default.Y_min)
 
     assert cp.allclose(network.circuit, final, 10e-3, 10e-3)
+
+
+def test_reserved_grounds():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+
+    for sparse in (False, True):
+        network = nanowire_network(data, 0.2, sparse=sparse)
+        expected = nanowire_network(data, 0.2, sparse=sparse)
+        for wire in (3, 7):
+            connect(expected, wire_idx=wire, resistance=1 / default.Y_min)
+
+        # the loads take the reserved slots, without changing the matrices size
+        reserve(network, 3)
+        nodes, circuit = network.nodes, network.circuit
+        grounds = attach(network, [3, 7], [1 / default.Y_min] * 2)
+        assert grounds == [nodes - 3, nodes - 2]
+        assert network.nodes == nodes
+        assert network.circuit is circuit
+
+        def dense(matrix): return matrix.toarray() if sparse else matrix
+        assert cp.allclose(
+            dense(network.circuit)[:-1, :-1], dense(expected.circuit)
+        )
+
+        # detached slots are reused by the following loads
+        detach(network, grounds[:1])
+        assert connect(network, wire_idx=5, resistance=10) == grounds[0]
+        assert cp.allclose(dense(network.circuit)[5, grounds[0]], 0.1)
+        assert not dense(network.circuit)[3, grounds[0]]
+        assert network.circuit is circuit
+
+        # loads beyond the reserved slots are removed on disconnection
+        attach(network, [1, 2], [10, 10])
+        assert network.nodes == nodes + 1
+        disconnect(network)
+        assert network.nodes == nodes
+        assert network.external_grounds == 3
+        assert not dense(network.circuit)[:, -3:].any()
+
+
+def test_sparse_network_data():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    dense = generate_network_data(datasheet)
+    sparse = generate_network_data(datasheet, sparse=True)
+
+    assert 'wire_distances' not in sparse
+    assert cp.allclose(cp.asarray(sparse['adj_matrix'].toarray()),
+                       cp.asarray(dense['adj_matrix']))
+
+    equals(nanowire_network(sparse, 0.2), nanowire_network(dense, 0.2))
+
+
+def test_sparse_network_conversion():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    network = nanowire_network(data, 0.2, sparse=True)
+    connect(network, wire_idx=1, resistance=1 / default.Y_min)
+
+    converted = nx2nn(nn2nx(network), sparse=True)
+    assert converted.sparse
+    assert (converted.adjacency != network.adjacency).nnz == 0
+    assert cp.allclose(cp.asarray(converted.circuit.toarray()),
+                       cp.asarray(network.circuit.toarray()))
+
+    dense = nx2nn(nn2nx(network))
+    assert cp.allclose(dense.circuit, cp.asarray(network.circuit.toarray()))
+    assert cp.allclose(dense.voltage, cp.asarray(network.voltage))
+
+
+def test_copy_independence():
+    for ram in (True, False):
+        matrix = cp.asarray([[0, 1], [1, 0]], dtype=cp.float32)
+        network = simple_network(matrix)
+        network.wires_position = (cp.zeros(2), cp.zeros(2))
+        network.junctions_position = (cp.zeros(1), cp.zeros(1))
+        copied = copy(network, ram)
+
+        network.admittance[0, 1] += 1
+        network.voltage[0, 0] += 1
+        network.circuit[0, 1] += 1
+
+        # the copy does not share the arrays of the original network
+        assert float(copied.admittance[0, 1]) == 0
+        assert float(copied.voltage[0, 0]) == 0
+        assert float(copied.circuit[0, 1]) == 1
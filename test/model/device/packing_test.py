@@ -0,0 +1,61 @@
+import numpy as np
+
+from nn_simulator import backend as cp
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.network import copy
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.packing import pack, stimulate_pack, unpack
+from nn_simulator.model.solvers import reduced_spd
+from nn_simulator.model.stimulator import stimulate
+
+
+def test_packed_stimulation():
+    networks = []
+    for seed, sparse in ((1, False), (2, True), (3, True)):
+        datasheet = Datasheet(wires_count=200, Lx=120, Ly=120, seed=seed)
+        data = generate_network_data(datasheet, sparse=True)
+        network = nanowire_network(data, datasheet.Y_min, sparse=sparse)
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        networks.append(network)
+    networks[2].device_grounds += 1
+
+    expected = [copy(_, ram=False) for _ in networks]
+    packed = pack(networks)
+    assert packed.network.nodes == sum(_.nodes for _ in networks)
+    assert packed.network.grounds == 4
+
+    inputs = [{0: 5.00}, {0: 2.00, 3: 1.00}, {5: 4.00}]
+    for _ in range(5):
+        stimulate_pack(packed, datasheet, 0.05, inputs, reduced_spd)
+        for network, signals in zip(expected, inputs):
+            stimulate(network, datasheet, 0.05, signals, reduced_spd)
+
+    for network, result in zip(expected, unpack(packed)):
+        circuit, other = network.circuit, result.circuit
+        if network.sparse:
+            circuit, other = circuit.toarray(), other.toarray()
+        assert cp.allclose(circuit, other, atol=1e-6)
+        assert cp.allclose(network.voltage, result.voltage, atol=1e-6)
+
+
+def test_packed_positions():
+    networks = [
+        nanowire_network(generate_network_data(Datasheet(
+            wires_count=200, Lx=120, Ly=120, seed=seed
+        )), 0.2) for seed in (1, 2)
+    ]
+    packed = pack(networks).network
+
+    # the junctions positions follow the packed junctions
+    x, y = np.asarray(packed.junctions_position)
+    expected = np.concatenate([cp.asnumpy(_.junctions_position[0])
+                               for _ in networks])
+    assert np.allclose(np.sort(x), np.sort(expected))
+    assert len(x) == len(packed.junctions[0])
+
+    first, _ = packed.junctions
+    offset = networks[0].wires
+    assert np.allclose(x[first >= offset],
+                       cp.asnumpy(networks[1].junctions_position[0]))
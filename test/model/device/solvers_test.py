@@ -0,0 +1,184 @@
+import numpy as np
+import pytest
+
+from nn_simulator import backend as cp
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.interface.connector import connect, disconnect
+from nn_simulator.model.solvers import ConjugateGradient, dense_mna
+from nn_simulator.model.solvers import SolverContext, reduced_spd, sparse_mna
+from nn_simulator.model.stimulator import stimulate
+from test.model.device.stimulator_test import samples
+from test.model.device.utils import simple_network
+
+
+def test_sparse_mna_samples():
+    for circuit, expected_result in samples:
+        network = simple_network(cp.asarray(circuit, dtype=cp.float32), 1)
+        currents = sparse_mna(network, {0: 5.00})
+        assert cp.allclose(network.voltage[:-1], cp.asarray(expected_result))
+        assert len(currents) == 1
+
+
+def test_sparse_mna_on_dense_network():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet)
+    dense = nanowire_network(data, datasheet.Y_min)
+    other = nanowire_network(data, datasheet.Y_min)
+
+    # inputs are not given in sorted order on purpose
+    inputs = {5: 2.00, 0: 5.00}
+    for network, solver in ((dense, dense_mna), (other, sparse_mna)):
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        for _ in range(5):
+            stimulate(network, datasheet, 0.05, inputs, solver)
+
+    assert type(other.voltage) is type(dense.voltage)
+    assert cp.allclose(other.voltage, dense.voltage, atol=1e-5)
+    assert cp.allclose(other.circuit, dense.circuit, atol=1e-6)
+
+    # sources are forced to their voltages and their currents are returned
+    assert np.allclose(cp.asnumpy(other.voltage[[0, 5]]), [5.00, 2.00])
+    currents = sparse_mna(other, inputs)
+    assert np.allclose(cp.asnumpy(dense_mna(dense, inputs)), currents)
+
+
+def test_reduced_spd():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    network = nanowire_network(generate_network_data(datasheet), 0.2)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    inputs = {5: 2.00, 0: 5.00}
+
+    currents = reduced_spd(network, inputs)
+    reduced = network.voltage.copy()
+    expected = dense_mna(network, inputs)
+
+    assert cp.allclose(reduced, network.voltage, atol=1e-5)
+    assert np.allclose(currents, cp.asnumpy(expected), rtol=1e-4)
+
+
+def test_conjugate_gradient():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet)
+    network = nanowire_network(data, datasheet.Y_min)
+    other = nanowire_network(data, datasheet.Y_min)
+    solver = ConjugateGradient(tolerance=1e-10)
+
+    for n in (network, other):
+        connect(n, wire_idx=1, resistance=1 / datasheet.Y_min)
+    for _ in range(5):
+        stimulate(network, datasheet, 0.05, {0: 5.00}, reduced_spd)
+        stimulate(other, datasheet, 0.05, {0: 5.00}, solver)
+
+    assert cp.allclose(other.voltage, network.voltage, atol=1e-6)
+    assert len(solver.iterations) == 5
+
+    # the warm start lowers the iterations of the following time steps
+    assert max(solver.iterations[1:]) < solver.iterations[0]
+
+
+def test_solver_context():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    context = SolverContext()
+
+    for sparse in (False, True):
+        network = nanowire_network(data, datasheet.Y_min, sparse=sparse)
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        analyses = context.analyses
+
+        for inputs in ({0: 5.00, 7: 1.00}, {0: 2.00, 7: 3.00}):
+            stimulate(network, datasheet, 0.05, inputs)
+            expected = reduced_spd(network, inputs)
+            voltage = network.voltage.copy()
+
+            assert np.allclose(context(network, inputs), expected)
+            assert cp.allclose(network.voltage, voltage, atol=1e-6)
+
+        # steps with the same structure and sources are not analysed again
+        assert context.analyses == analyses + 1
+
+        context(network, {0: 5.00})
+        assert context.analyses == analyses + 2
+
+        connect(network, wire_idx=2, resistance=1 / datasheet.Y_min)
+        context(network, {0: 5.00})
+        assert context.analyses == analyses + 3
+
+
+def test_mixed_precision():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    network = nanowire_network(data, datasheet.Y_min, sparse=True)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    stimulate(network, datasheet, 0.05, {0: 5.00})
+
+    double = SolverContext()
+    expected = double(network, {0: 5.00, 7: 1.00})
+    voltage = network.voltage.copy()
+
+    # the refinement recovers the double precision accuracy
+    mixed = SolverContext(precision='mixed')
+    currents = mixed(network, {0: 5.00, 7: 1.00})
+    assert np.allclose(currents, expected)
+    assert np.allclose(network.voltage, voltage, rtol=0, atol=1e-10)
+    assert mixed.residuals[-1] < 1e-12
+
+    single = SolverContext(precision='mixed', refinements=0)
+    single(network, {0: 5.00, 7: 1.00})
+    assert mixed.residuals[-1] < single.residuals[-1]
+
+    with pytest.raises(ValueError):
+        SolverContext(precision='half')
+
+
+def test_low_rank_update():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    network = nanowire_network(data, datasheet.Y_min, sparse=True)
+    stimulate(network, datasheet, 0.05, {0: 5.00})
+    inputs = {0: 5.00, 7: 1.00}
+
+    context = SolverContext(rank=4)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    context(network, inputs)
+
+    # moving the load only changes the diagonal of two nodes
+    for wire in (2, 30, 100):
+        disconnect(network)
+        connect(network, wire_idx=wire, resistance=1 / datasheet.Y_min)
+
+        expected = reduced_spd(network, inputs)
+        voltage = network.voltage.copy()
+        assert np.allclose(context(network, inputs), expected)
+        assert np.allclose(network.voltage, voltage, rtol=0, atol=1e-10)
+    assert context.analyses == 1
+    assert context.updates == 3
+
+    # the new topology is kept, without moving the load again
+    assert context.key[0] == network.topology
+    context(network, inputs)
+    assert context.analyses == 1
+    assert context.updates == 4
+
+    # a few junctions changes reuse the factorization, many do not
+    rows, columns = network.junctions
+    for changes in (2, 50):
+        for i, j in zip(rows[:changes], columns[:changes]):
+            network.circuit[i, j] *= 2
+            network.circuit[j, i] *= 2
+
+        reduced_spd(network, inputs)
+        voltage = network.voltage.copy()
+        context(network, inputs)
+        assert np.allclose(network.voltage, voltage, rtol=0, atol=1e-10)
+    assert context.updates == 5
+
+    # changes below the threshold are left to the refinement
+    network.circuit.data *= 1 + 5e-7
+    reduced_spd(network, inputs)
+    voltage = network.voltage.copy()
+    context(network, inputs)
+    assert np.allclose(network.voltage, voltage, rtol=0, atol=1e-10)
+    assert context.updates == 6
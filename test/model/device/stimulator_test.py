@@ -1,7 +1,15 @@
-import cupy as cp
+import numpy as np
 
+from nn_simulator import backend as cp
 from nn_simulator import default
-from nn_simulator.model.device.network import Network
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.factory import nanowire_network
+from nn_simulator.model.device.network import Network, copy
+from nn_simulator.model.device.networks import generate_network_data, to_np
+from nn_simulator.model.interface.connector import connect
+from nn_simulator.model.solvers import reduced_spd
+from nn_simulator.model.stimulator import stimulate, stimulate_adaptive
+from nn_simulator.model.stimulator import stimulate_sequence
 from nn_simulator.model.stimulator import modified_voltage_node_analysis
 from nn_simulator.model.stimulator import update_conductance
 from test.model.device.utils import simple_network
@@ -101,3 +109,128 @@ def test_stimulated_change():
     # update an additional time and get the network state
     update_conductance(network, default, 0.1)
     assert not cp.allclose(initial, network.circuit, atol=10e-3)
+
+
+def test_sparse_stimulation():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+    dense = nanowire_network(data, datasheet.Y_min)
+    sparse = nanowire_network(data, datasheet.Y_min, sparse=True)
+    assert sparse.sparse and not dense.sparse
+
+    for network in (dense, sparse):
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        for _ in range(5):
+            stimulate(network, datasheet, 0.05, {0: 5.00})
+
+    assert sparse.adjacency.nnz == int(cp.count_nonzero(dense.adjacency))
+    assert cp.allclose(cp.asarray(sparse.circuit.toarray()),
+                       dense.circuit, atol=1e-4)
+    assert cp.allclose(cp.asarray(sparse.admittance.toarray()),
+                       dense.admittance, atol=1e-3)
+    assert cp.allclose(cp.asarray(sparse.voltage), dense.voltage, atol=1e-3)
+    assert all((to_np(a) == to_np(b)).all()
+               for a, b in zip(sparse.junctions, dense.junctions))
+
+
+def test_stimulate_sequence():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet, sparse=True)
+
+    for sparse in (False, True):
+        network = nanowire_network(data, datasheet.Y_min, sparse=sparse)
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+        expected = copy(network, ram=False)
+
+        schedule = [{0: 5.00}] * 5 + [{0: 0.01, 4: 1.00}] * 5
+        for inputs in schedule:
+            stimulate(expected, datasheet, 0.05, inputs, reduced_spd)
+
+        steps = []
+        out = np.empty((len(schedule), network.nodes))
+        stimulate_sequence(
+            network, datasheet, 0.05, schedule, out=out,
+            callback=lambda step, _: steps.append(step)
+        )
+
+        assert steps == list(range(len(schedule)))
+        assert np.allclose(out[-1], to_np(expected.voltage), atol=1e-6)
+        assert np.allclose(to_np(network.circuit), to_np(expected.circuit))
+
+
+def test_junctions_update():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    network = nanowire_network(generate_network_data(datasheet), 0.2)
+    connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    modified_voltage_node_analysis(network, {0: 5.00})
+    expected = copy(network, ram=False)
+    update_conductance(network, datasheet, 0.1)
+
+    # full-matrix form of the update, excluding the external ground
+    A, V = expected.device.adjacency, expected.device.voltage
+    delta_v = cp.absolute(V.reshape(-1, 1) - A * V)
+    kp = datasheet.kp0 * cp.exp(datasheet.eta_p * delta_v)
+    kd = datasheet.kd0 * cp.exp(-datasheet.eta_d * delta_v)
+    partial = kd / kp * expected.device.admittance * cp.exp(-0.1 * (kp + kd))
+    G = A * kp / (kp + kd) * (1 + partial)
+    Y = A * (datasheet.Y_min + G * (datasheet.Y_max - datasheet.Y_min))
+
+    assert cp.allclose(network.device.admittance, G, atol=1e-6)
+    assert cp.allclose(network.device.circuit, Y, atol=1e-6)
+    assert cp.allclose(network.circuit[-1], expected.circuit[-1])
+
+
+def test_adaptive_stimulation():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet)
+    networks = [nanowire_network(data, datasheet.Y_min) for _ in range(3)]
+    for network in networks:
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+    reference, adaptive, fixed = networks
+
+    # the switching is followed with many sub-steps
+    solves = stimulate_adaptive(adaptive, datasheet, 0.5, {0: 10.00})
+    for _ in range(500):
+        stimulate(reference, datasheet, 0.001, {0: 10.00})
+    stimulate(fixed, datasheet, 0.5, {0: 10.00})
+    assert 1 < solves < 500
+
+    def error(network):
+        delta = network.admittance - reference.admittance
+        return float(cp.absolute(delta).max())
+    assert error(adaptive) < error(fixed) / 4
+
+    # quiescent junctions are stepped over at once
+    stimulate_adaptive(adaptive, datasheet, 100, {0: 0.00})
+    assert stimulate_adaptive(adaptive, datasheet, 10, {0: 0.00}) == 2
+
+
+def test_steady_fast_forward():
+    datasheet = Datasheet(wires_count=300, Lx=150, Ly=150)
+    data = generate_network_data(datasheet)
+    networks = [nanowire_network(data, datasheet.Y_min) for _ in range(2)]
+    for network in networks:
+        connect(network, wire_idx=1, resistance=1 / datasheet.Y_min)
+
+    # count the solutions of the circuit
+    solves = []
+
+    def solver(network, inputs):
+        solves.append(network)
+        return reduced_spd(network, inputs)
+
+    schedule = [{0: 10.00}] * 10 + [{0: 0.01}] * 80
+    results = [np.empty((len(schedule), network.nodes)) for _ in networks]
+    steps = []
+    for network, out, steady in zip(networks, results, (None, 5e-2)):
+        stimulate_sequence(
+            network, datasheet, 0.05, schedule, solver, out=out,
+            callback=lambda step, _: steps.append(step), steady=steady
+        )
+
+    regular, fast = results
+    assert steps == 2 * list(range(len(schedule)))
+    assert len(solves) < 1.25 * len(schedule)
+    assert np.allclose(fast, regular, rtol=1e-2, atol=1e-3)
+    assert cp.allclose(networks[0].admittance, networks[1].admittance,
+                       atol=1e-2)
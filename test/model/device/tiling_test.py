@@ -0,0 +1,22 @@
+import numpy as np
+
+from nn_simulator.model.device.datasheet.Datasheet import Datasheet
+from nn_simulator.model.device.networks import generate_network_data
+from nn_simulator.model.device.tiling import generate_network_data_tiled
+from nn_simulator.model.device.tiling import junctions_chunks, load_junctions
+
+
+def test_tiled_generation_equals_serial(tmp_path):
+    datasheet = Datasheet(wires_count=400, Lx=200, Ly=200)
+
+    expected = generate_network_data(datasheet)
+    wires_dict = generate_network_data_tiled(datasheet, str(tmp_path), 3, 2)
+
+    assert 'edge_list' not in wires_dict
+    assert 'wire_distances' not in wires_dict
+    assert wires_dict['number_of_junctions'] == expected['number_of_junctions']
+    assert sum(1 for _ in junctions_chunks(str(tmp_path))) == 9
+
+    load_junctions(wires_dict)
+    for key in ('xi', 'yi', 'edge_list'):
+        assert np.array_equal(wires_dict[key], expected[key])
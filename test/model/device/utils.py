@@ -1,5 +1,4 @@
-import cupy as cp
-
+from nn_simulator import backend as cp
 from nn_simulator.model.device.network import Network
 
 
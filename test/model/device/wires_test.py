@@ -0,0 +1,61 @@
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from nn_simulator.model.device.wires import detect_junctions
+from nn_simulator.model.device.wires import detect_junctions_pairwise
+from nn_simulator.model.device.wires import generate_dist_lengths
+from nn_simulator.model.device.wires import generate_wires_distribution
+
+
+def distribution(seed: int):
+    return generate_wires_distribution(
+        number_of_wires=300, wire_av_length=40.0, wire_dispersion=14.0,
+        centroid_dispersion=200, general_normal_shape=10,
+        Lx=150, Ly=150, seed=seed
+    )
+
+
+def assert_same_junctions(grid, pairwise):
+    assert grid['number_of_junctions'] == pairwise['number_of_junctions']
+    for key in ('xi', 'yi', 'edge_list'):
+        assert grid[key].dtype == pairwise[key].dtype
+        assert np.array_equal(grid[key], pairwise[key])
+
+
+def test_grid_detection_equals_pairwise():
+    for seed in (1, 40, 1234):
+        grid, pairwise = distribution(seed), distribution(seed)
+
+        detect_junctions(grid)
+        detect_junctions_pairwise(pairwise)
+
+        assert_same_junctions(grid, pairwise)
+
+
+def test_grid_detection_cell_size_independence():
+    expected = distribution(40)
+    detect_junctions_pairwise(expected)
+
+    for cell_size in (5.0, 40.0, 1000.0):
+        wires_dict = copy(distribution(40))
+        detect_junctions(wires_dict, cell_size=cell_size)
+
+        assert_same_junctions(wires_dict, expected)
+
+
+def test_concurrent_reproducibility():
+    seeds = [*range(8)] * 2
+    with ThreadPoolExecutor(4) as executor:
+        concurrent = [*executor.map(distribution, seeds)]
+
+    for seed, wires_dict in zip(seeds, concurrent):
+        expected = distribution(seed)
+        for key in ('xc', 'yc', 'theta', 'wire_lengths'):
+            assert np.array_equal(wires_dict[key], expected[key])
+
+
+def test_positive_lengths():
+    lengths = generate_dist_lengths(1000, 1.0, 5.0, np.random.default_rng(0))
+    assert len(lengths) == 1000
+    assert np.all(lengths >= 0)
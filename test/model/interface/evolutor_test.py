@@ -1,5 +1,4 @@
-import cupy as cp
-
+from nn_simulator import backend as cp
 from nn_simulator import non_ground_selection, minimum_distance_selection
 from nn_simulator.model.device.network import Network
 from test.model.device.utils import simple_network